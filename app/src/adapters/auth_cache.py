@@ -0,0 +1,170 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Type, TypeVar
+
+import orjson
+from pydantic import BaseModel, ValidationError
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from core.settings import logger, settings
+from db import redis
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:  # pragma: no cover
+    Fernet = None  # type: ignore[assignment, misc]
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class AuthDataCache:
+    """Кеш авторизационных данных пользователей, полученных от token manager.
+
+    Первый уровень - разобранные DTO (общие, официального и неофициального API) в памяти процесса.
+    Второй уровень - общие для всех воркеров данные в redis, зашифрованные ключом AUTH_CACHE_ENCRYPTION_KEY
+    (включается, если задан ключ и установлен пакет cryptography).
+    Сбрасывается при запросе обновления токена и при ответе wildberries 401/403 на запрос с сессией
+    пользователя (см. adapters.wb.wbadapter.BaseWBAdapter); сброс рассылается остальным процессам через redis pub/sub.
+    """
+
+    KINDS = ("base", "official", "unofficial")
+    KEY_PREFIX = "wba:auth"
+    CHANNEL = "wba:auth:invalidate"
+
+    def __init__(self) -> None:
+        self._entries: OrderedDict[tuple[uuid.UUID, str], tuple[float, BaseModel]] = OrderedDict()
+        self._listener: asyncio.Task | None = None
+        self._fernet_key: str | None = None
+        self._fernet_instance: Any = None
+
+    def get(self, user_id: uuid.UUID, kind: str, model: Type[M]) -> M | None:
+        if not settings.WBADAPTER.AUTH_CACHE_ENABLED:
+            return None
+        key = (user_id, kind)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at or not isinstance(value, model):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, user_id: uuid.UUID, kind: str, value: BaseModel) -> None:
+        if not settings.WBADAPTER.AUTH_CACHE_ENABLED:
+            return
+        key = (user_id, kind)
+        self._entries[key] = (time.monotonic() + settings.WBADAPTER.AUTH_CACHE_TTL, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > settings.WBADAPTER.AUTH_CACHE_MAX_SIZE:
+            self._entries.popitem(last=False)
+
+    def invalidate_local(self, user_id: uuid.UUID) -> None:
+        for kind in self.KINDS:
+            self._entries.pop((user_id, kind), None)
+
+    async def invalidate(self, user_id: uuid.UUID) -> None:
+        """Сбрасывает данные пользователя в этом процессе, в redis и во всех остальных процессах."""
+        self.invalidate_local(user_id)
+        client = redis.client
+        if client is None:
+            return
+        try:
+            await client.delete(self._key(user_id))
+            await client.publish(self.CHANNEL, str(user_id))
+        except RedisError as e:
+            logger.warning(f"Could not invalidate shared auth data. user_id={user_id}, error: {e}")
+
+    def _fernet(self) -> Any:
+        """Возвращает шифратор для текущего ключа; создается заново только при смене ключа."""
+        key = settings.WBADAPTER.AUTH_CACHE_ENCRYPTION_KEY
+        if Fernet is None or key is None or not key.get_secret_value():
+            return None
+        if self._fernet_instance is None or self._fernet_key != key.get_secret_value():
+            self._fernet_instance = Fernet(key.get_secret_value())
+            self._fernet_key = key.get_secret_value()
+        return self._fernet_instance
+
+    def _key(self, user_id: uuid.UUID) -> str:
+        return f"{self.KEY_PREFIX}:{user_id}"
+
+    async def get_shared(self, user_id: uuid.UUID, model: Type[M]) -> M | None:
+        """Возвращает данные пользователя из redis, если общий уровень кеша включен."""
+        fernet = self._fernet()
+        client = redis.client
+        if not settings.WBADAPTER.AUTH_CACHE_ENABLED or fernet is None or client is None:
+            return None
+        try:
+            raw = await client.get(self._key(user_id))
+        except RedisError as e:
+            logger.warning(f"Shared auth data is unavailable: {e}.")
+            return None
+        if raw is None:
+            return None
+        try:
+            return model.parse_obj(orjson.loads(fernet.decrypt(raw)))
+        except InvalidToken:
+            logger.warning(f"Could not decrypt shared auth data. user_id={user_id}")
+        except (ValueError, ValidationError) as e:
+            # Запись другой версии схемы: считаем промахом и удаляем, чтобы ее перезаписали.
+            logger.warning(f"Could not parse shared auth data. user_id={user_id}, error: {e}")
+        try:
+            await client.delete(self._key(user_id))
+        except RedisError as e:
+            logger.warning(f"Shared auth data is unavailable: {e}.")
+        return None
+
+    async def set_shared(self, user_id: uuid.UUID, value: BaseModel) -> None:
+        fernet = self._fernet()
+        client = redis.client
+        if not settings.WBADAPTER.AUTH_CACHE_ENABLED or fernet is None or client is None:
+            return
+        try:
+            await client.set(
+                self._key(user_id),
+                fernet.encrypt(orjson.dumps(value.dict())),
+                px=int(settings.WBADAPTER.AUTH_CACHE_SHARED_TTL * 1000),
+            )
+        except RedisError as e:
+            logger.warning(f"Shared auth data is unavailable: {e}.")
+
+    async def start(self, client: Redis) -> None:
+        """Запускает прием сбросов кеша от других процессов."""
+        key = settings.WBADAPTER.AUTH_CACHE_ENCRYPTION_KEY
+        if key is not None and key.get_secret_value() and self._fernet() is None:
+            logger.warning(
+                "AUTH_CACHE_ENCRYPTION_KEY is set, but the cryptography package is not installed: "
+                "shared auth data cache in redis is disabled."
+            )
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen(client))
+
+    async def stop(self) -> None:
+        if self._listener is None:
+            return
+        self._listener.cancel()
+        try:
+            await self._listener
+        except asyncio.CancelledError:
+            pass
+        self._listener = None
+
+    async def _listen(self, client: Redis) -> None:
+        while True:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.CHANNEL)
+                async for message in pubsub.listen():
+                    self.invalidate_local(uuid.UUID(message["data"].decode()))
+            except (RedisError, ValueError) as e:
+                logger.warning(f"Auth data invalidation listener failed: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.reset()
+
+
+auth_cache = AuthDataCache()
@@ -1,3 +1,3 @@
 #!/bin/bash
 
-poetry run openapi-python-client generate --path openapi2.json --config config.yaml
+poetry run openapi-python-client generate --path openapi2.json --config config.yaml --custom-template-path templates
@@ -148,8 +148,11 @@ async def asyncio_detailed(
         x_user_id=x_user_id,
     )
 
-    async with httpx.AsyncClient(verify=client.verify_ssl) as _client:
-        response = await _client.request(**kwargs)
+    if client.async_httpx_client is not None:
+        response = await client.async_httpx_client.request(**kwargs)
+    else:
+        async with httpx.AsyncClient(verify=client.verify_ssl) as _client:
+            response = await _client.request(**kwargs)
 
     return _build_response(client=client, response=response)
 
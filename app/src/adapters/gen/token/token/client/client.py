@@ -1,7 +1,8 @@
 import ssl
-from typing import Dict, Union
+from typing import Dict, Optional, Union
 
 import attr
+import httpx
 
 
 @attr.s(auto_attribs=True)
@@ -19,6 +20,8 @@ class Client:
         raise_on_unexpected_status: Whether or not to raise an errors.UnexpectedStatus if the API returns a
             status code that was not documented in the source OpenAPI document.
         follow_redirects: Whether or not to follow redirects. Default value is False.
+        async_httpx_client: A long-lived httpx.AsyncClient used by asyncio functions. If not set, every request
+            opens a new client (and a new connection).
     """
 
     base_url: str
@@ -28,6 +31,7 @@ class Client:
     verify_ssl: Union[str, bool, ssl.SSLContext] = attr.ib(True, kw_only=True)
     raise_on_unexpected_status: bool = attr.ib(False, kw_only=True)
     follow_redirects: bool = attr.ib(False, kw_only=True)
+    async_httpx_client: Optional[httpx.AsyncClient] = attr.ib(None, kw_only=True)
 
     def get_headers(self) -> Dict[str, str]:
         """Get headers to be used in all endpoints"""
@@ -51,6 +55,10 @@ class Client:
         """Get a new client matching this one with a new timeout (in seconds)"""
         return attr.evolve(self, timeout=timeout)
 
+    def with_async_httpx_client(self, async_httpx_client: httpx.AsyncClient) -> "Client":
+        """Get a new client matching this one that sends asyncio requests through async_httpx_client"""
+        return attr.evolve(self, async_httpx_client=async_httpx_client)
+
 
 @attr.s(auto_attribs=True)
 class AuthenticatedClient(Client):
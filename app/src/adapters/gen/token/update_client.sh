@@ -1,3 +1,3 @@
 #!/bin/bash
 
-poetry run openapi-python-client update --path openapi.json --config config.yaml
+poetry run openapi-python-client update --path openapi.json --config config.yaml --custom-template-path templates
@@ -1,8 +1,14 @@
+import asyncio
+import time
 import uuid
+from typing import Iterable
 
+import httpx
 from httpx import ConnectError
 from pydantic import ValidationError
+from redis.exceptions import RedisError
 
+from adapters.auth_cache import auth_cache
 from adapters.gen.token.token.client import Client
 from adapters.gen.token.token.client.api.auth_data import (
     get_auth_data_v1_auth_data_get,
@@ -10,29 +16,83 @@ from adapters.gen.token.token.client.api.auth_data import (
 )
 from adapters.gen.token.token.client.models import AuthDataGetResponse
 from adapters.gen.token.token.client.models.http_validation_error import HTTPValidationError
+from adapters.token_age import token_ages
+from adapters.wb.singleflight import SingleFlight
 from core.settings import logger, settings
+from db import redis
 from dto.token import OfficialUserAuthDataDTO, UnofficialUserAuthDataDTO, UserAuthDataBase
 from exceptions.base import WBAError
 
+REFRESH_LOCK_PREFIX = "wba:auth:refresh"
+# Снимает блокировку, только если она принадлежит этому процессу.
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+token_refreshes: SingleFlight[None] = SingleFlight()
+
+
+# Настройки запросов сгенерированного клиента token manager; пул соединений подключается в TokenManager.
+TOKEN_MANAGER_CLIENT = Client(
+    base_url=settings.TOKEN_MANAGER_URL,
+    timeout=5,
+    verify_ssl=True,
+    follow_redirects=True,
+    raise_on_unexpected_status=True,
+)
+
 
 class TokenManager:
-    def __init__(self) -> None:
+    def __init__(self, http_client: httpx.AsyncClient) -> None:
         self.url = settings.TOKEN_MANAGER_URL
-        self.client = Client(
-            base_url=settings.TOKEN_MANAGER_URL,
-            timeout=5,
-            verify_ssl=True,
-            follow_redirects=True,
-            raise_on_unexpected_status=True,
-        )
+        self.client = TOKEN_MANAGER_CLIENT.with_async_httpx_client(http_client)
 
     async def auth_data_by_user_id(self, user_id: uuid.UUID) -> UserAuthDataBase:
+        if cached := auth_cache.get(user_id, "base", UserAuthDataBase):
+            return cached
+        if shared := await auth_cache.get_shared(user_id, UserAuthDataBase):
+            auth_cache.set(user_id, "base", shared)
+            return shared
+
+        user_auth_data = await self._fetch_auth_data(user_id)
+        auth_cache.set(user_id, "base", user_auth_data)
+        await auth_cache.set_shared(user_id, user_auth_data)
+        return user_auth_data
+
+    async def auth_data_many(self, user_ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, UserAuthDataBase]:
+        """Возвращает авторизационные данные нескольких пользователей и прогревает ими кеш.
+
+        У token manager нет метода для получения данных нескольких пользователей, поэтому данные
+        запрашиваются параллельно, не более TOKEN_MANAGER_BULK_CONCURRENCY запросов одновременно.
+        Пользователи, данные которых получить не удалось, в результат не попадают.
+        """
+        semaphore = asyncio.Semaphore(settings.WBADAPTER.TOKEN_MANAGER_BULK_CONCURRENCY)
+
+        async def fetch(user_id: uuid.UUID) -> UserAuthDataBase | None:
+            async with semaphore:
+                try:
+                    return await self.auth_data_by_user_id(user_id)
+                except WBAError as e:
+                    logger.warning(f"Could not get authorization data. user_id={user_id}, error: {e.description}")
+                    return None
+                except Exception as e:
+                    # Ошибки клиента token manager и таймауты httpx не должны прерывать остальной пакет.
+                    logger.warning(f"Could not get authorization data. user_id={user_id}, error: {e!r}")
+                    return None
+
+        unique_ids = list(dict.fromkeys(user_ids))
+        results = await asyncio.gather(*(fetch(user_id) for user_id in unique_ids))
+        return {user_id: auth_data for user_id, auth_data in zip(unique_ids, results) if auth_data is not None}
+
+    async def _fetch_auth_data(self, user_id: uuid.UUID) -> UserAuthDataBase:
+        """Запрашивает авторизационные данные у token manager, минуя кеш."""
         auth_data: AuthDataGetResponse | HTTPValidationError | None = None
         try:
-            auth_data = await get_auth_data_v1_auth_data_get.asyncio(
-                client=self.client,
-                x_user_id=str(user_id),
-            )
+            response = await get_auth_data_v1_auth_data_get.asyncio_detailed(client=self.client, x_user_id=str(user_id))
+            auth_data = response.parsed
 
         except ConnectError as e:
             logger.error(f"Could not connect to token manager ({self.url}). error: {e}")
@@ -62,6 +122,7 @@ class TokenManager:
             )
         )
         auth_data_dict = auth_data.to_dict()
+        await token_ages.observe(user_id, auth_data_dict.get("wb_token_access"))
         return UserAuthDataBase(
             wb_supplier_id=auth_data_dict.get("wb_supplier_id"),
             wb_token_access=auth_data_dict.get("wb_token_access"),
@@ -70,29 +131,106 @@ class TokenManager:
         )
 
     async def auth_data_by_user_id_official(self, user_id: uuid.UUID) -> OfficialUserAuthDataDTO:
+        if cached := auth_cache.get(user_id, "official", OfficialUserAuthDataDTO):
+            return cached
+
         auth_data: UserAuthDataBase = await self.auth_data_by_user_id(user_id)
         try:
-            return OfficialUserAuthDataDTO.parse_obj(auth_data.dict())
+            official = OfficialUserAuthDataDTO.parse_obj(auth_data.dict())
         except ValidationError as e:
             logger.error(e.errors())
             raise WBAError(
                 description=f"Can't find wb_token_ad for user_id={user_id}.",
             ) from e
+        auth_cache.set(user_id, "official", official)
+        return official
 
     async def auth_data_by_user_id_unofficial(self, user_id: uuid.UUID) -> UnofficialUserAuthDataDTO:
+        if cached := auth_cache.get(user_id, "unofficial", UnofficialUserAuthDataDTO):
+            return cached
+
         auth_data: UserAuthDataBase = await self.auth_data_by_user_id(user_id)
         try:
-            return UnofficialUserAuthDataDTO.parse_obj(auth_data.dict())
+            unofficial = UnofficialUserAuthDataDTO.parse_obj(auth_data.dict())
         except ValidationError as e:
             logger.error(e.errors())
             raise WBAError(
                 description=f"Can't find authorization data for user_id={user_id}.",
             ) from e
+        auth_cache.set(user_id, "unofficial", unofficial)
+        return unofficial
 
     async def request_update_user_access_token(self, user_id: uuid.UUID, wb_token_access: str) -> None:
-        await update_wb_token_v1_auth_data_update_get.asyncio(
-            client=self.client,
-            x_user_id=str(user_id),
-            wb_token_access=wb_token_access,
-        )
+        try:
+            await update_wb_token_v1_auth_data_update_get.asyncio_detailed(
+                client=self.client,
+                x_user_id=str(user_id),
+                wb_token_access=wb_token_access,
+            )
+        finally:
+            # Сброс после запроса, чтобы не сохранить старый токен, прочитанный во время обновления.
+            await auth_cache.invalidate(user_id)
         logger.debug(f"Send request to update wb_token_access for user_id:{user_id}.")
+
+    async def refresh_auth_data_unofficial(self, user_id: uuid.UUID, wb_token_access: str) -> UnofficialUserAuthDataDTO:
+        """Обновляет wb_token_access пользователя и возвращает новые авторизационные данные.
+
+        Одновременно для пользователя выполняется одно обновление: в процессе - общий вызов,
+        между процессами - блокировка в redis. Остальные вызывающие дожидаются, пока token manager
+        не вернет токен, отличный от wb_token_access, но не дольше TOKEN_REFRESH_TIMEOUT секунд.
+
+        Arguments:
+            wb_token_access -- токен, на который wildberries ответил 401/403.
+        """
+        await token_refreshes.do(user_id, lambda: self._refresh(user_id, wb_token_access))
+        return await self.auth_data_by_user_id_unofficial(user_id)
+
+    async def _refresh(self, user_id: uuid.UUID, wb_token_access: str) -> None:
+        lock_key = f"{REFRESH_LOCK_PREFIX}:{user_id}"
+        lock_value = uuid.uuid4().hex
+        locked = await self._acquire_refresh_lock(lock_key, lock_value)
+        try:
+            if locked:
+                await self.request_update_user_access_token(user_id=user_id, wb_token_access=wb_token_access)
+
+            deadline = time.monotonic() + settings.WBADAPTER.TOKEN_REFRESH_TIMEOUT
+            while True:
+                auth_data = await self._fetch_auth_data(user_id)
+                if auth_data.wb_token_access != wb_token_access:
+                    await auth_cache.invalidate(user_id)
+                    auth_cache.set(user_id, "base", auth_data)
+                    await auth_cache.set_shared(user_id, auth_data)
+                    return
+                if time.monotonic() >= deadline:
+                    logger.warning(f"wb_token_access was not updated in time. user_id={user_id}")
+                    return
+                await asyncio.sleep(settings.WBADAPTER.TOKEN_REFRESH_POLL_INTERVAL)
+        finally:
+            if locked:
+                await self._release_refresh_lock(lock_key, lock_value)
+
+    @staticmethod
+    async def _acquire_refresh_lock(lock_key: str, lock_value: str) -> bool:
+        """Возвращает True, если обновление токена должен запросить этот процесс."""
+        client = redis.client
+        if client is None:
+            return True
+        try:
+            return bool(
+                await client.set(
+                    lock_key, lock_value, nx=True, px=int(settings.WBADAPTER.TOKEN_REFRESH_LOCK_TTL * 1000)
+                )
+            )
+        except RedisError as e:
+            logger.warning(f"Token refresh lock is unavailable: {e}.")
+            return True
+
+    @staticmethod
+    async def _release_refresh_lock(lock_key: str, lock_value: str) -> None:
+        client = redis.client
+        if client is None:
+            return
+        try:
+            await client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, lock_value)
+        except RedisError as e:
+            logger.warning(f"Token refresh lock is unavailable: {e}.")
@@ -0,0 +1,92 @@
+import time
+import uuid
+
+from redis.exceptions import RedisError
+
+from adapters.wb.session import token_hash
+from core.settings import logger, settings
+from db import redis
+
+# KEYS[1] - хеш user_id -> хеш текущего токена, KEYS[2] - время выпуска токенов (sorted set по user_id),
+# KEYS[3] - время выпуска этого токена, записанное при его получении (SupplierAdapter.wb_user_auth).
+# ARGV[1] - user_id, ARGV[2] - хеш токена, ARGV[3] - текущее время.
+OBSERVE_SCRIPT = """
+if redis.call('HGET', KEYS[1], ARGV[1]) == ARGV[2] then
+    return 0
+end
+local issued_at = redis.call('GET', KEYS[3]) or ARGV[3]
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('ZADD', KEYS[2], issued_at, ARGV[1])
+return 1
+"""
+
+
+class TokenAgeRegistry:
+    """Возраст wb_token_access пользователей, общий для всех процессов (redis).
+
+    Время выпуска токена записывается при его получении от wildberries, а к пользователю токен
+    привязывается, когда token manager впервые возвращает его для этого пользователя.
+    По реестру фоновая задача (tasks.refresh_tokens) обновляет токены до истечения их срока.
+    """
+
+    TOKENS_KEY = "wba:auth:token_hashes"
+    ISSUED_AT_KEY = "wba:auth:issued_at"
+    ISSUED_PREFIX = "wba:auth:issued"
+
+    async def issued(self, wb_token_access: str) -> None:
+        """Запоминает время выпуска нового токена."""
+        client = redis.client
+        if client is None:
+            return
+        try:
+            await client.set(
+                f"{self.ISSUED_PREFIX}:{token_hash(wb_token_access)}",
+                time.time(),
+                ex=int(settings.WBADAPTER.TOKEN_ACCESS_LIFETIME),
+            )
+        except RedisError as e:
+            logger.warning(f"Token age registry is unavailable: {e}.")
+
+    async def observe(self, user_id: uuid.UUID, wb_token_access: str | None) -> None:
+        """Привязывает к пользователю токен, полученный от token manager, если он сменился."""
+        client = redis.client
+        if client is None or not wb_token_access:
+            return
+        hashed = token_hash(wb_token_access)
+        try:
+            await client.eval(
+                OBSERVE_SCRIPT,
+                3,
+                self.TOKENS_KEY,
+                self.ISSUED_AT_KEY,
+                f"{self.ISSUED_PREFIX}:{hashed}",
+                str(user_id),
+                hashed,
+                time.time(),
+            )
+        except RedisError as e:
+            logger.warning(f"Token age registry is unavailable: {e}.")
+
+    async def due(self, limit: int) -> list[uuid.UUID]:
+        """Возвращает пользователей с самыми старыми токенами, которые пора обновить."""
+        client = redis.client
+        if client is None:
+            return []
+        expires_before = time.time() - settings.WBADAPTER.TOKEN_ACCESS_LIFETIME + settings.WBADAPTER.TOKEN_REFRESH_AHEAD
+        members = await client.zrangebyscore(self.ISSUED_AT_KEY, "-inf", expires_before, start=0, num=limit)
+        return [uuid.UUID(member.decode()) for member in members]
+
+    async def touch(self, user_id: uuid.UUID) -> None:
+        """Откладывает следующее обновление токена пользователя на полный срок жизни токена."""
+        client = redis.client
+        if client is not None:
+            await client.zadd(self.ISSUED_AT_KEY, {str(user_id): time.time()})
+
+    async def forget(self, user_id: uuid.UUID) -> None:
+        client = redis.client
+        if client is not None:
+            await client.zrem(self.ISSUED_AT_KEY, str(user_id))
+            await client.hdel(self.TOKENS_KEY, str(user_id))
+
+
+token_ages = TokenAgeRegistry()
@@ -0,0 +1,170 @@
+import asyncio
+import time
+from collections import OrderedDict
+from enum import Enum
+from functools import partial
+from typing import Awaitable, Callable, Type, TypeVar
+
+import orjson
+from pydantic import BaseModel, ValidationError
+from redis.exceptions import RedisError
+
+from adapters.wb.singleflight import SingleFlight
+from core.settings import logger, settings
+from core.utils.context import cache_status
+from db import redis
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class CacheStatus(str, Enum):
+    """Источник ответа, возвращается клиенту в заголовке X-Cache.
+
+    Values:
+        hit - актуальные данные из кеша,
+        stale - устаревшие данные из кеша, обновление запущено в фоне,
+        miss - данные получены от wildberries.
+    """
+
+    HIT = "HIT"
+    STALE = "STALE"
+    MISS = "MISS"
+
+
+class CacheEntry:
+    __slots__ = ("value", "fresh_until", "stale_until")
+
+    def __init__(self, value: BaseModel, fresh_until: float, stale_until: float) -> None:
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class ResponseCache:
+    """Двухуровневый кеш ответов wildberries: LRU в памяти процесса и общий для всех воркеров redis.
+
+    Запись актуальна CACHE_TTL секунд, после этого еще CACHE_STALE_TTL секунд отдается как устаревшая,
+    а обновление выполняется в фоне; оба времени задаются по методам. Ошибки wildberries не кешируются.
+    Возвращаемые объекты общие для всех вызывающих и не должны изменяться.
+    """
+
+    KEY_PREFIX = "wba:cache"
+
+    def __init__(self) -> None:
+        self._local: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._loads: SingleFlight[BaseModel] = SingleFlight()
+        self._refreshes: set[asyncio.Task] = set()
+
+    async def get_or_load(self, name: str, key: str, model: Type[M], loader: Callable[[], Awaitable[M]]) -> M:
+        """Возвращает значение из кеша или загружает его через loader.
+
+        Arguments:
+            name -- имя метода, по нему выбирается время жизни из CACHE_TTL и CACHE_STALE_TTL,
+            key -- ключ значения в пределах метода.
+        """
+        ttl = settings.WBADAPTER.CACHE_TTL.get(name)
+        if not settings.WBADAPTER.CACHE_ENABLED or not ttl:
+            cache_status.set(CacheStatus.MISS.value)
+            return await loader()
+
+        stale_ttl = settings.WBADAPTER.CACHE_STALE_TTL.get(name, 0.0)
+        full_key = f"{self.KEY_PREFIX}:{name}:{key}"
+        now = time.time()
+        entry = self._local_get(full_key, now)
+        if entry is None:
+            entry = await self._redis_get(full_key, model, now)
+
+        if entry is not None:
+            if now < entry.fresh_until:
+                cache_status.set(CacheStatus.HIT.value)
+            else:
+                cache_status.set(CacheStatus.STALE.value)
+                self._refresh(full_key, ttl, stale_ttl, loader)
+            return entry.value  # type: ignore[return-value]
+
+        cache_status.set(CacheStatus.MISS.value)
+        load = partial(self._load, full_key, ttl, stale_ttl, loader)
+        return await self._loads.do(full_key, load)  # type: ignore[return-value]
+
+    async def _load(self, full_key: str, ttl: float, stale_ttl: float, loader: Callable[[], Awaitable[M]]) -> M:
+        value = await loader()
+        now = time.time()
+        entry = CacheEntry(value=value, fresh_until=now + ttl, stale_until=now + ttl + stale_ttl)
+        self._local_set(full_key, entry)
+        await self._redis_set(full_key, entry, ttl + stale_ttl)
+        return value
+
+    def _refresh(self, full_key: str, ttl: float, stale_ttl: float, loader: Callable[[], Awaitable[M]]) -> None:
+        async def refresh() -> None:
+            try:
+                await self._loads.do(full_key, partial(self._load, full_key, ttl, stale_ttl, loader))
+            except Exception as e:
+                logger.warning(f"Failed to refresh cache {full_key}: {e}")
+
+        task = asyncio.create_task(refresh())
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
+
+    def _local_get(self, full_key: str, now: float) -> CacheEntry | None:
+        entry = self._local.get(full_key)
+        if entry is None:
+            return None
+        if now >= entry.stale_until:
+            del self._local[full_key]
+            return None
+        self._local.move_to_end(full_key)
+        return entry
+
+    def _local_set(self, full_key: str, entry: CacheEntry) -> None:
+        self._local[full_key] = entry
+        self._local.move_to_end(full_key)
+        while len(self._local) > settings.WBADAPTER.CACHE_LOCAL_MAX_ENTRIES:
+            self._local.popitem(last=False)
+
+    async def _redis_get(self, full_key: str, model: Type[M], now: float) -> CacheEntry | None:
+        client = redis.client
+        if client is None:
+            return None
+        try:
+            raw = await client.get(full_key)
+        except RedisError as e:
+            logger.warning(f"Cache is unavailable: {e}.")
+            return None
+        if raw is None:
+            return None
+        try:
+            data = orjson.loads(raw)
+            entry = CacheEntry(
+                value=model.parse_obj(data["value"]),
+                fresh_until=float(data["fresh_until"]),
+                stale_until=float(data["stale_until"]),
+            )
+        except (ValueError, KeyError, TypeError, ValidationError) as e:
+            # Запись другой версии схемы или поврежденная запись: считаем промахом и удаляем.
+            logger.warning(f"Could not parse cache entry {full_key}: {e}")
+            try:
+                await client.delete(full_key)
+            except RedisError as e:
+                logger.warning(f"Cache is unavailable: {e}.")
+            return None
+        if now >= entry.stale_until:
+            return None
+        self._local_set(full_key, entry)
+        return entry
+
+    async def _redis_set(self, full_key: str, entry: CacheEntry, expire: float) -> None:
+        client = redis.client
+        if client is None:
+            return
+        data = {
+            "value": entry.value.dict(by_alias=True),
+            "fresh_until": entry.fresh_until,
+            "stale_until": entry.stale_until,
+        }
+        try:
+            await client.set(full_key, orjson.dumps(data), px=int(expire * 1000))
+        except RedisError as e:
+            logger.warning(f"Cache is unavailable: {e}.")
+
+
+response_cache = ResponseCache()
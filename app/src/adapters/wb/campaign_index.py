@@ -0,0 +1,95 @@
+from redis.exceptions import RedisError
+
+from core.settings import logger, settings
+from db import redis
+from dto.official.advert import CampaignDTO, CampaignInfoDTO, CampaignType
+from schemas.common import BaseOrjsonModel
+
+
+class CampaignMeta(BaseOrjsonModel):
+    """Неизменяемые параметры рекламной кампании, нужные для изменения ставок и интервалов."""
+
+    type: CampaignType | None = None
+    subject_id: int | None = None
+    set_id: int | None = None
+    menu_id: int | None = None
+
+    @property
+    def param(self) -> int | None:
+        """Значение param для /v0/cpm и /v0/intervals: menuId для РК в каталоге,
+        setId для РК в карточке товара, subjectId для остальных."""
+        if self.type == CampaignType.CATALOG and self.menu_id:
+            return self.menu_id
+        if self.type == CampaignType.CARD and self.set_id:
+            return self.set_id
+        return self.subject_id
+
+    @classmethod
+    def from_info(cls, campaign: CampaignInfoDTO) -> "CampaignMeta":
+        meta = cls(type=campaign.type)
+        if campaign.params:
+            param = campaign.params[0]
+            meta.subject_id, meta.set_id, meta.menu_id = param.subjectId, param.setId, param.menuId
+        return meta
+
+
+class CampaignIndex:
+    """Индекс параметров рекламных кампаний в redis: id кампании -> CampaignMeta.
+
+    Заполняется ответами /v0/advert, /v0/adverts и при создании кампании, чтобы для изменения
+    ставки не запрашивать кампанию у wildberries. Если redis недоступен, индекс пуст.
+    """
+
+    KEY_PREFIX = "wba:campaign:meta"
+
+    def _key(self, id: int) -> str:
+        return f"{self.KEY_PREFIX}:{id}"
+
+    async def get(self, id: int) -> CampaignMeta | None:
+        client = redis.client
+        if client is None:
+            return None
+        try:
+            data = await client.hgetall(self._key(id))
+        except RedisError as e:
+            logger.warning(f"Campaign index is unavailable: {e}.")
+            return None
+        if not data:
+            return None
+        return CampaignMeta.parse_obj({key.decode(): value.decode() for key, value in data.items()})
+
+    async def param(self, id: int) -> int | None:
+        meta = await self.get(id)
+        return meta.param if meta else None
+
+    async def remember(self, id: int, meta: CampaignMeta) -> None:
+        await self._save({id: meta})
+
+    async def remember_info(self, campaign: CampaignInfoDTO) -> None:
+        await self._save({campaign.advertId: CampaignMeta.from_info(campaign)})
+
+    async def remember_many(self, campaigns: list[CampaignDTO]) -> None:
+        await self._save({campaign.advertId: CampaignMeta(type=campaign.type) for campaign in campaigns})
+
+    async def _save(self, metas: dict[int, CampaignMeta]) -> None:
+        """Дополняет записи индекса известными полями, не стирая ранее сохраненные."""
+        client = redis.client
+        if client is None or not metas:
+            return
+        ttl = int(settings.WBADAPTER.CAMPAIGN_INDEX_TTL)
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for id, meta in metas.items():
+                    fields: dict[str | bytes, int] = {
+                        key: int(value) for key, value in meta.dict(exclude_none=True).items()
+                    }
+                    if not fields:
+                        continue
+                    pipe.hset(self._key(id), mapping=fields)
+                    pipe.expire(self._key(id), ttl)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Campaign index is unavailable: {e}.")
+
+
+campaign_index = CampaignIndex()
@@ -0,0 +1,180 @@
+import math
+import time
+from collections import deque
+from enum import Enum
+from http import HTTPStatus
+
+from redis.exceptions import RedisError
+
+from core.settings import logger, settings
+from db import redis
+from exceptions.upstream import WBUnavailableError
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class Circuit:
+    """Состояние автомата для одного хоста wildberries в текущем процессе."""
+
+    def __init__(self) -> None:
+        self.state = CircuitState.CLOSED
+        # Результаты запросов за CIRCUIT_FAILURE_WINDOW по секундам: [секунда, запросов, ошибок].
+        self.outcomes: deque[list[int]] = deque()
+        self.open_until = 0.0
+        self.probe_started: float | None = None
+        self.synced = 0.0
+
+    def count(self, now: float, failed: bool) -> tuple[int, int]:
+        """Учитывает результат запроса и возвращает число запросов и ошибок за окно."""
+        second = int(now)
+        window_start = second - settings.WBADAPTER.CIRCUIT_FAILURE_WINDOW
+        while self.outcomes and self.outcomes[0][0] <= window_start:
+            self.outcomes.popleft()
+        if not self.outcomes or self.outcomes[-1][0] != second:
+            self.outcomes.append([second, 0, 0])
+        self.outcomes[-1][1] += 1
+        self.outcomes[-1][2] += failed
+        return sum(outcome[1] for outcome in self.outcomes), sum(outcome[2] for outcome in self.outcomes)
+
+
+class CircuitBreaker:
+    """Автомат защиты запросов к хостам wildberries.
+
+    Если за CIRCUIT_FAILURE_WINDOW секунд к хосту было не меньше CIRCUIT_MIN_REQUESTS запросов и доля
+    ошибок (5xx или сетевых) среди них не меньше CIRCUIT_FAILURE_RATIO, запросы к хосту отклоняются
+    без обращения к wildberries в течение CIRCUIT_OPEN_SECONDS. Запрос учитывается один раз вместе
+    с повторами (см. adapters.wb.wbadapter).
+    Затем пропускается один пробный запрос: при успехе автомат закрывается, при ошибке снова открывается.
+    Открытие автомата публикуется в redis, поэтому хост отключается во всех процессах.
+    """
+
+    KEY_PREFIX = "wba:circuit"
+
+    def __init__(self) -> None:
+        self._circuits: dict[str, Circuit] = {}
+
+    def _circuit(self, host: str) -> Circuit:
+        circuit = self._circuits.get(host)
+        if circuit is None:
+            circuit = Circuit()
+            self._circuits[host] = circuit
+        return circuit
+
+    def _open_key(self, host: str) -> str:
+        return f"{self.KEY_PREFIX}:{host}:open"
+
+    def _probe_key(self, host: str) -> str:
+        return f"{self.KEY_PREFIX}:{host}:probe"
+
+    @staticmethod
+    def _unavailable(host: str, seconds: float) -> WBUnavailableError:
+        return WBUnavailableError(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            description=f"Сервис {host} временно недоступен. Повторите запрос через {math.ceil(seconds)} с.",
+        )
+
+    async def _sync(self, host: str, circuit: Circuit, now: float) -> None:
+        """Подхватывает открытие автомата другим процессом, не чаще раза в CIRCUIT_SYNC_INTERVAL секунд."""
+        client = redis.client
+        if client is None or now - circuit.synced < settings.WBADAPTER.CIRCUIT_SYNC_INTERVAL:
+            return
+        circuit.synced = now
+        try:
+            ttl_ms = await client.pttl(self._open_key(host))
+        except RedisError as e:
+            logger.warning(f"Circuit breaker state is unavailable: {e}.")
+            return
+        if ttl_ms > 0 and circuit.state is CircuitState.CLOSED:
+            circuit.state = CircuitState.OPEN
+            circuit.open_until = now + ttl_ms / 1000
+
+    async def _acquire_probe(self, host: str, circuit: Circuit, now: float) -> bool:
+        timeout = settings.WBADAPTER.CIRCUIT_PROBE_TIMEOUT
+        if circuit.probe_started is not None and now - circuit.probe_started < timeout:
+            return False
+        client = redis.client
+        if client is not None:
+            try:
+                if not await client.set(self._probe_key(host), 1, nx=True, px=int(timeout * 1000)):
+                    return False
+            except RedisError as e:
+                logger.warning(f"Circuit breaker state is unavailable: {e}.")
+        circuit.probe_started = now
+        return True
+
+    async def before_request(self, host: str) -> None:
+        """Проверяет, можно ли отправить запрос к хосту.
+
+        Raises:
+            WBUnavailableError: автомат открыт, запрос не отправляется.
+        """
+        if not settings.WBADAPTER.CIRCUIT_BREAKER_ENABLED:
+            return
+        now = time.monotonic()
+        circuit = self._circuit(host)
+        await self._sync(host, circuit, now)
+        if circuit.state is CircuitState.CLOSED:
+            return
+        if now < circuit.open_until:
+            raise self._unavailable(host, circuit.open_until - now)
+        circuit.state = CircuitState.HALF_OPEN
+        if not await self._acquire_probe(host, circuit, now):
+            raise self._unavailable(host, settings.WBADAPTER.CIRCUIT_PROBE_TIMEOUT)
+
+    async def on_success(self, host: str) -> None:
+        if not settings.WBADAPTER.CIRCUIT_BREAKER_ENABLED:
+            return
+        circuit = self._circuit(host)
+        if circuit.state is CircuitState.CLOSED:
+            circuit.count(time.monotonic(), failed=False)
+            return
+        logger.info(f"Circuit for {host} is closed.")
+        circuit.state = CircuitState.CLOSED
+        circuit.probe_started = None
+        client = redis.client
+        if client is not None:
+            try:
+                await client.delete(self._open_key(host), self._probe_key(host))
+            except RedisError as e:
+                logger.warning(f"Circuit breaker state is unavailable: {e}.")
+
+    async def on_failure(self, host: str) -> None:
+        if not settings.WBADAPTER.CIRCUIT_BREAKER_ENABLED:
+            return
+        now = time.monotonic()
+        circuit = self._circuit(host)
+        if circuit.state is CircuitState.OPEN:
+            return
+        if circuit.state is CircuitState.CLOSED:
+            total, failures = circuit.count(now, failed=True)
+            if (
+                total < settings.WBADAPTER.CIRCUIT_MIN_REQUESTS
+                or failures < total * settings.WBADAPTER.CIRCUIT_FAILURE_RATIO
+            ):
+                return
+            reason = f"{failures} failures of {total} requests"
+        else:
+            reason = "failed probe"
+        await self._open(host, circuit, now, reason)
+
+    async def _open(self, host: str, circuit: Circuit, now: float, reason: str) -> None:
+        open_seconds = settings.WBADAPTER.CIRCUIT_OPEN_SECONDS
+        logger.warning(f"Circuit for {host} is open for {open_seconds}s after {reason}.")
+        circuit.state = CircuitState.OPEN
+        circuit.open_until = now + open_seconds
+        circuit.probe_started = None
+        circuit.outcomes.clear()
+        client = redis.client
+        if client is not None:
+            try:
+                await client.set(self._open_key(host), 1, px=int(open_seconds * 1000))
+                await client.delete(self._probe_key(host))
+            except RedisError as e:
+                logger.warning(f"Circuit breaker state is unavailable: {e}.")
+
+
+circuit_breaker = CircuitBreaker()
@@ -1,9 +1,13 @@
+import asyncio
 from http import HTTPStatus
+from typing import AsyncGenerator
 
 from httpx import HTTPStatusError
 from pydantic import ValidationError, parse_obj_as
 
+from adapters.wb.campaign_index import campaign_index
 from adapters.wb.official.wbadapter import WBAdapter
+from adapters.wb.session import WBSession
 from core.settings import logger, settings
 from dto.official.advert import (
     ActualStakeDTO,
@@ -21,7 +25,7 @@ from exceptions.base import WBAError
 
 
 class AdvertAdapter(WBAdapter):
-    async def actual_stakes(self, type: int, param: int) -> ActualStakesDTO:
+    async def actual_stakes(self, session: WBSession, type: int, param: int) -> ActualStakesDTO:
         """Метод возвращает список актуальных ставок по ключевой фразе."""
 
         url = f"{settings.WBADAPTER.WB_OFFICIAL_API_ADV_URL}/v0/cpm"
@@ -31,7 +35,7 @@ class AdvertAdapter(WBAdapter):
         }
         error_desc = "Не удалось получить список актуальных ставок."
         try:
-            result = await self._get(url=url, params=params)
+            result = await self._get(url=url, session=session, params=params)
             stakes = parse_obj_as(list[ActualStakeDTO], result.json())
             return ActualStakesDTO(stakes=stakes)
         except HTTPStatusError as e:
@@ -46,7 +50,7 @@ class AdvertAdapter(WBAdapter):
                 description=error_desc,
             ) from e
 
-    async def change_rate(self, advert_id: int, type: int, cpm: int, param: int) -> None:
+    async def change_rate(self, session: WBSession, advert_id: int, type: int, cpm: int, param: int) -> None:
         """Метод позволяет установить новое значние ставки на торгах.
 
         Arguments:
@@ -70,14 +74,14 @@ class AdvertAdapter(WBAdapter):
         }
         error_desc = "Не удалось установить новое значение ставки."
         try:
-            await self._post(url=url, body=body)
+            await self._post(url=url, session=session, body=body)
         except HTTPStatusError as e:
             raise WBAError(
                 status_code=e.response.status_code,
                 description=f"{error_desc} body={body}. ",
             ) from e
 
-    async def start_campaign(self, id: int) -> None:
+    async def start_campaign(self, session: WBSession, id: int) -> None:
         """Метод позволяет запустить рекламную кампанию.
 
         Arguments:
@@ -90,14 +94,14 @@ class AdvertAdapter(WBAdapter):
         params = {"id": id}
         error_desc = "Не удалось запустить рекламную кампанию."
         try:
-            await self._get(url=url, params=params)
+            await self._get(url=url, session=session, params=params)
         except HTTPStatusError as e:
             raise WBAError(
                 status_code=e.response.status_code,
                 description=error_desc,
             ) from e
 
-    async def pause_campaign(self, id: int) -> None:
+    async def pause_campaign(self, session: WBSession, id: int) -> None:
         """Метод позволяет поставить рекламную кампанию на паузу.
 
         Arguments:
@@ -110,7 +114,7 @@ class AdvertAdapter(WBAdapter):
         params = {"id": id}
         error_desc = "Не удалось поставить рекламную кампанию на паузу."
         try:
-            await self._get(url=url, params=params)
+            await self._get(url=url, session=session, params=params)
         except HTTPStatusError as e:
             raise WBAError(
                 status_code=e.response.status_code,
@@ -119,6 +123,7 @@ class AdvertAdapter(WBAdapter):
 
     async def campaigns(
         self,
+        session: WBSession,
         status: CampaignStatus | None,
         type: CampaignType | None,
         limit: int | None = None,
@@ -163,11 +168,12 @@ class AdvertAdapter(WBAdapter):
         }
         error_desc = "Не удалось получить списк рекламных кампаний."
         try:
-            result = await self._get(url=url, params=params)
+            result = await self._get(url=url, session=session, params=params)
             data = result.json()
             if not data:
                 return None
             campaigns = parse_obj_as(list[CampaignDTO], result.json())
+            await campaign_index.remember_many(campaigns)
             return CampaignsDTO(campaigns=campaigns)
         except HTTPStatusError as e:
             raise WBAError(
@@ -181,7 +187,60 @@ class AdvertAdapter(WBAdapter):
                 description=error_desc,
             ) from e
 
-    async def set_time_intervals(self, wb_campaign_id: int, intervals: list[IntervalDTO], param: int) -> None:
+    async def iter_campaigns(
+        self,
+        session: WBSession,
+        status: CampaignStatus | None,
+        type: CampaignType | None,
+        page_size: int | None = None,
+        order: str = "create",
+        direction: str = "desc",
+    ) -> AsyncGenerator[list[CampaignDTO], None]:
+        """Возвращает все рекламные кампании пользователя WB постранично.
+
+        Следующая страница запрашивается, пока обрабатывается текущая. Если итерация прервана,
+        запрос следующей страницы отменяется.
+
+        Keyword Arguments:
+            page_size -- Количество кампаний на странице (default: {CAMPAIGNS_PAGE_SIZE})
+        """
+        limit = page_size or settings.WBADAPTER.CAMPAIGNS_PAGE_SIZE
+
+        def fetch(offset: int) -> asyncio.Task[CampaignsDTO | None]:
+            return asyncio.create_task(
+                self.campaigns(
+                    session=session,
+                    status=status,
+                    type=type,
+                    limit=limit,
+                    offset=offset,
+                    order=order,
+                    direction=direction,
+                )
+            )
+
+        offset = 0
+        next_page = fetch(offset)
+        try:
+            while True:
+                page = await next_page
+                campaigns = page.campaigns if page else []
+                # Неполная страница - последняя.
+                if len(campaigns) < limit:
+                    if campaigns:
+                        yield campaigns
+                    return
+                offset += limit
+                next_page = fetch(offset)
+                yield campaigns
+        finally:
+            if not next_page.cancel() and not next_page.cancelled():
+                # Запрос уже завершился: ошибку забираем, чтобы asyncio не писал ее в лог.
+                next_page.exception()
+
+    async def set_time_intervals(
+        self, session: WBSession, wb_campaign_id: int, intervals: list[IntervalDTO], param: int
+    ) -> None:
         """Метод позволяет установить время показа рекламной кампании.
 
         Arguments:
@@ -202,14 +261,14 @@ class AdvertAdapter(WBAdapter):
         }
         error_desc = "Не удалось изменить интервал показа рекламной кампании."
         try:
-            await self._post(url=url, body=body)
+            await self._post(url=url, session=session, body=body)
         except HTTPStatusError as e:
             raise WBAError(
                 status_code=e.response.status_code,
                 description=error_desc,
             ) from e
 
-    async def campaign(self, id: int) -> CampaignInfoDTO | None:
+    async def campaign(self, session: WBSession, id: int) -> CampaignInfoDTO | None:
         """Метод позволяет получить информацию о рекламной кампании.
 
         Arguments:
@@ -224,11 +283,15 @@ class AdvertAdapter(WBAdapter):
         params = {"id": id}
         error_desc = "Не удалось получить информацию о рекламной кампании."
         try:
-            result = await self._get(url=url, params=params)
+            result = await self._get(url=url, session=session, params=params)
             if result.status_code == HTTPStatus.NO_CONTENT:
                 return None
             data = result.json()
-            return CampaignInfoDTO.parse_obj(data) if data else None
+            if not data:
+                return None
+            campaign = CampaignInfoDTO.parse_obj(data)
+            await campaign_index.remember_info(campaign)
+            return campaign
         except HTTPStatusError as e:
             raise WBAError(
                 status_code=e.response.status_code,
@@ -241,7 +304,7 @@ class AdvertAdapter(WBAdapter):
                 description=error_desc,
             ) from e
 
-    async def balance(self) -> BalanceDTO:
+    async def balance(self, session: WBSession) -> BalanceDTO:
         """Метод позволяет получить информацию о балансе пользователя.
 
         Returns:
@@ -251,7 +314,7 @@ class AdvertAdapter(WBAdapter):
         url = f"{settings.WBADAPTER.WB_OFFICIAL_API_ADV_URL}/v1/balance"
         error_desc = "Не удалось получить информацию о балансе пользователя."
         try:
-            result = await self._get(url=url)
+            result = await self._get(url=url, session=session)
             data = result.json()
             return BalanceDTO.parse_obj(data)
         except HTTPStatusError as e:
@@ -266,7 +329,7 @@ class AdvertAdapter(WBAdapter):
                 description=error_desc,
             ) from e
 
-    async def budget(self, wb_campaign_id: int) -> BudgetDTO:
+    async def budget(self, session: WBSession, wb_campaign_id: int) -> BudgetDTO:
         """Метод позволяет получить информацию о бюджете рекламной кампании.
 
         Returns:
@@ -277,7 +340,7 @@ class AdvertAdapter(WBAdapter):
         params = {"id": wb_campaign_id}
         error_desc = "Не удалось получить информацию о бюджете рекламной кампании."
         try:
-            result = await self._get(url=url, params=params)
+            result = await self._get(url=url, session=session, params=params)
             data = result.json()
             return BudgetDTO.parse_obj(data)
         except HTTPStatusError as e:
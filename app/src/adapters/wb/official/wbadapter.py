@@ -1,66 +1,24 @@
-import httpx
+import uuid
+from functools import lru_cache
 
+from adapters.wb.session import WBSession
 from adapters.wb.wbadapter import BaseWBAdapter
-from dto.token import OfficialUserAuthDataDTO, UserAuthDataBase
+from core.settings import settings
+from dto.token import OfficialUserAuthDataDTO
 
 
-class WBAdapter(BaseWBAdapter):
-    def __init__(self, http_client: httpx.AsyncClient):
-        super().__init__(http_client=http_client)
-        self.headers: dict = {}
-        self.cookies: dict = {}
-        self._auth_data: OfficialUserAuthDataDTO | None = None
-
-    @property
-    def auth_data(self) -> UserAuthDataBase | None:
-        return self._auth_data
-
-    @auth_data.setter
-    def auth_data(self, auth_data: OfficialUserAuthDataDTO) -> None:
-        self._auth_data = auth_data
-        self.headers["Authorization"] = auth_data.wb_token_ad
+@lru_cache(maxsize=settings.WBADAPTER.SESSION_CACHE_SIZE)
+def _official_session(user_id: uuid.UUID | None, wb_supplier_id: str | None, wb_token_ad: str) -> WBSession:
+    return WBSession.build(
+        headers=(("Authorization", wb_token_ad),),
+        user_id=user_id,
+        supplier_id=wb_supplier_id,
+        token=wb_token_ad,
+    )
 
-    async def _post(
-        self,
-        url: str,
-        headers: dict | None = None,
-        cookies: dict | None = None,
-        body: dict | None = None,
-    ) -> httpx.Response:
-        if headers is None:
-            headers = dict(self.headers)
-        if cookies is None:
-            cookies = dict(self.cookies)
 
-        body = body or {}
-        response: httpx.Response = await super()._post(url, headers, cookies, body)
-        return response
-
-    async def _put(
-        self,
-        url: str,
-        headers: dict | None = None,
-        cookies: dict | None = None,
-        body: dict | None = None,
-    ) -> httpx.Response:
-        if headers is None:
-            headers = dict(self.headers)
-        if cookies is None:
-            cookies = dict(self.cookies)
-        body = body or {}
-        response: httpx.Response = await super()._put(url, headers, cookies, body)
-        return response
-
-    async def _get(
-        self,
-        url: str,
-        headers: dict | None = None,
-        cookies: dict | None = None,
-        params: dict | None = None,
-    ) -> httpx.Response:
-        if headers is None:
-            headers = dict(self.headers)
-        if cookies is None:
-            cookies = dict(self.cookies)
-        response: httpx.Response = await super()._get(url, headers, cookies, params)
-        return response
+class WBAdapter(BaseWBAdapter):
+    @staticmethod
+    def session(auth_data: OfficialUserAuthDataDTO, user_id: uuid.UUID | None = None) -> WBSession:
+        """Возвращает сессию официального API для пользователя (кешируется по user_id и токену)."""
+        return _official_session(user_id, auth_data.wb_supplier_id, auth_data.wb_token_ad)
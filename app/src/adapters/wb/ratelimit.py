@@ -0,0 +1,241 @@
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+
+import httpx
+from redis.asyncio import Redis
+from redis.commands.core import AsyncScript
+from redis.exceptions import RedisError
+
+from core.settings import logger, settings
+from db import redis
+
+
+def retry_after(response: httpx.Response) -> float | None:
+    """Возвращает значение заголовка Retry-After в секундах (поддерживаются секунды и HTTP-дата)."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, float(parsedate_to_datetime(value).timestamp()) - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveTokenBucket:
+    """Token bucket, скорость которого подстраивается под ответы wildberries.
+
+    При 429 скорость уменьшается в RATE_LIMIT_DECREASE_FACTOR раз (и выдерживается Retry-After),
+    после каждого успешного ответа - плавно возвращается к исходной на RATE_LIMIT_INCREASE_STEP.
+    """
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._used = self._updated
+        self._lock = asyncio.Lock()
+
+    def idle(self, now: float, ttl: float) -> bool:
+        """Корзина не использовалась дольше ttl секунд, не ждет окончания паузы и ее никто не ждет."""
+        return not self._lock.locked() and now - max(self._used, self._blocked_until) > ttl
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> float:
+        """Дожидается свободного токена и возвращает время ожидания в секундах."""
+        waited = 0.0
+        # Ожидающие обслуживаются по очереди, чтобы не будить всех одновременно после паузы.
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    delay = self._blocked_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        self._used = now
+                        return waited
+                    delay = (1 - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def on_success(self) -> None:
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + settings.WBADAPTER.RATE_LIMIT_INCREASE_STEP)
+
+    def on_throttled(self, delay: float | None) -> None:
+        now = time.monotonic()
+        self._refill(now)
+        self.rate = max(
+            settings.WBADAPTER.RATE_LIMIT_MIN_RPS, self.rate * settings.WBADAPTER.RATE_LIMIT_DECREASE_FACTOR
+        )
+        self._tokens = 0.0
+        if delay:
+            self._blocked_until = max(self._blocked_until, now + delay)
+
+
+# Token bucket в redis. KEYS[1] - состояние корзины, KEYS[2] - пауза после 429.
+# ARGV[1] - скорость (запросов в секунду), ARGV[2] - размер корзины.
+# Возвращает 0, если токен выдан, иначе время до следующей попытки в миллисекундах.
+# Используется время redis, поэтому часы разных воркеров не влияют на расчет.
+ACQUIRE_SCRIPT = """
+local blocked = redis.call('PTTL', KEYS[2])
+if blocked > 0 then
+    return blocked
+end
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+return wait
+"""
+
+
+class DistributedRateLimiter:
+    """Общий для всех процессов (gunicorn и arq воркеров) лимит запросов поставщика к группе хостов.
+
+    Состояние хранится в redis и изменяется атомарно lua-скриптом. Если redis недоступен,
+    запрос не блокируется: остается локальное ограничение процесса.
+    """
+
+    KEY_PREFIX = "wba:ratelimit"
+
+    def __init__(self) -> None:
+        self._script: AsyncScript | None = None
+        self._client: Redis | None = None
+
+    def _get_script(self, client: Redis) -> AsyncScript:
+        if self._script is None or self._client is not client:
+            self._script = client.register_script(ACQUIRE_SCRIPT)
+            self._client = client
+        return self._script
+
+    def _keys(self, group: str, scope: str) -> tuple[str, str]:
+        key = f"{self.KEY_PREFIX}:{group}:{scope}"
+        return key, f"{key}:blocked"
+
+    async def acquire(self, group: str, scope: str) -> float:
+        """Дожидается токена в общей корзине и возвращает время ожидания в секундах."""
+        client = redis.client
+        if client is None:
+            return 0.0
+        rate = settings.WBADAPTER.RATE_LIMIT_GROUP_RPS.get(group, settings.WBADAPTER.RATE_LIMIT_SUPPLIER_RPS)
+        burst = max(1.0, rate * settings.WBADAPTER.RATE_LIMIT_BURST_SECONDS)
+        waited = 0.0
+        while True:
+            try:
+                wait_ms = await self._get_script(client)(keys=self._keys(group, scope), args=[rate, burst])
+            except RedisError as e:
+                logger.warning(f"Distributed rate limiter is unavailable: {e}.")
+                return waited
+            if not wait_ms:
+                return waited
+            delay = int(wait_ms) / 1000
+            await asyncio.sleep(delay)
+            waited += delay
+
+    async def throttle(self, group: str, scope: str, delay: float | None) -> None:
+        """Приостанавливает запросы поставщика к группе хостов во всех процессах на время Retry-After."""
+        client = redis.client
+        if client is None:
+            return
+        delay = delay or settings.WBADAPTER.RATE_LIMIT_THROTTLE_DELAY
+        try:
+            await client.set(self._keys(group, scope)[1], 1, px=max(1, int(delay * 1000)))
+        except RedisError as e:
+            logger.warning(f"Distributed rate limiter is unavailable: {e}.")
+
+
+class RateLimiter:
+    """Ограничитель частоты запросов к wildberries.
+
+    Локально: по хосту и по поставщику на этом хосте. Для запросов поставщика дополнительно
+    действует общий лимит в redis по группе хостов (см. core.http.HostFamily).
+
+    Лимиты wildberries действуют на токен поставщика, поэтому на 429 подстраивается только корзина
+    поставщика; корзина хоста - постоянный верхний предел и подстраивается только для запросов
+    без поставщика.
+    """
+
+    def __init__(self) -> None:
+        self._buckets: dict[str, AdaptiveTokenBucket] = {}
+        self._pruned = time.monotonic()
+        self.distributed = DistributedRateLimiter()
+
+    def _bucket(self, key: str, rate: float) -> AdaptiveTokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._prune()
+            bucket = AdaptiveTokenBucket(rate=rate, burst=rate * settings.WBADAPTER.RATE_LIMIT_BURST_SECONDS)
+            self._buckets[key] = bucket
+        return bucket
+
+    def _prune(self) -> None:
+        """Удаляет неиспользуемые корзины, не чаще раза в RATE_LIMIT_BUCKET_IDLE_TTL секунд."""
+        now = time.monotonic()
+        ttl = settings.WBADAPTER.RATE_LIMIT_BUCKET_IDLE_TTL
+        if now - self._pruned < ttl:
+            return
+        self._pruned = now
+        for key in [key for key, bucket in self._buckets.items() if bucket.idle(now, ttl)]:
+            del self._buckets[key]
+
+    def _host_bucket(self, host: str) -> AdaptiveTokenBucket:
+        host_rate = settings.WBADAPTER.RATE_LIMIT_HOST_RPS.get(host, settings.WBADAPTER.RATE_LIMIT_DEFAULT_HOST_RPS)
+        return self._bucket(host, host_rate)
+
+    def _scope_bucket(self, host: str, scope: str) -> AdaptiveTokenBucket:
+        return self._bucket(f"{host}:{scope}", settings.WBADAPTER.RATE_LIMIT_SUPPLIER_RPS)
+
+    async def acquire(self, host: str, scope: str | None, group: str | None = None) -> float:
+        """Дожидается разрешения на запрос к хосту и возвращает суммарное время ожидания в секундах."""
+        if not settings.WBADAPTER.RATE_LIMIT_ENABLED:
+            return 0.0
+        waited = 0.0
+        # Сначала очередь поставщика, чтобы ожидающий паузы поставщик не занимал токены хоста.
+        if scope:
+            waited += await self._scope_bucket(host, scope).acquire()
+        waited += await self._host_bucket(host).acquire()
+        if scope and group and settings.WBADAPTER.RATE_LIMIT_DISTRIBUTED:
+            waited += await self.distributed.acquire(group, scope)
+        return waited
+
+    async def feedback(self, host: str, scope: str | None, response: httpx.Response, group: str | None = None) -> None:
+        if not settings.WBADAPTER.RATE_LIMIT_ENABLED:
+            return
+        bucket = self._scope_bucket(host, scope) if scope else self._host_bucket(host)
+        if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+            delay = retry_after(response)
+            logger.warning(f"Too many requests to {host}, scope={scope}, retry_after={delay}.")
+            bucket.on_throttled(delay)
+            if scope and group and settings.WBADAPTER.RATE_LIMIT_DISTRIBUTED:
+                await self.distributed.throttle(group, scope, delay)
+        elif response.is_success:
+            bucket.on_success()
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,105 @@
+import random
+import re
+import time
+from dataclasses import dataclass
+from http import HTTPStatus
+
+import httpx
+
+from adapters.wb.ratelimit import retry_after
+from core.settings import logger, settings
+
+# Ответы, которые wildberries отдает до обработки запроса: повтор безопасен для любого метода.
+NOT_PROCESSED_CODES = frozenset({HTTPStatus.TOO_MANY_REQUESTS})
+SERVER_ERROR_CODES = frozenset(
+    {
+        HTTPStatus.INTERNAL_SERVER_ERROR,
+        HTTPStatus.BAD_GATEWAY,
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        HTTPStatus.GATEWAY_TIMEOUT,
+    }
+)
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """Правила повтора запроса к wildberries.
+
+    Attributes:
+        retry_codes - коды ответа, при которых запрос повторяется,
+        idempotent - повтор не меняет результат; для неидемпотентных запросов (создание кампании,
+            пополнение бюджета) повтор после ответов не из NOT_PROCESSED_CODES выполняется
+            только если вызывающий код передал guard, подтверждающий, что запрос не был применен,
+        max_tries - максимальное количество попыток, включая первую,
+        max_time - максимальное суммарное время попыток, в секундах.
+    """
+
+    retry_codes: frozenset[int]
+    idempotent: bool = True
+    max_tries: int = 5
+    max_time: float = settings.WBADAPTER.MAX_RETRY_TIME
+
+    def delay(self, attempt: int, response: httpx.Response) -> float:
+        """Пауза перед следующей попыткой: Retry-After, если он задан, иначе full jitter."""
+        after = retry_after(response)
+        if after is not None:
+            return after
+        cap = min(settings.WBADAPTER.RETRY_MAX_DELAY, settings.WBADAPTER.RETRY_BASE_DELAY * 2 ** (attempt - 1))
+        return random.uniform(0, cap)
+
+    def need_guard(self, status_code: int) -> bool:
+        return not self.idempotent and status_code not in NOT_PROCESSED_CODES
+
+
+# Чтение из личного кабинета: cmp периодически отвечает 400 на корректные запросы.
+CMP_READ = RetryPolicy(retry_codes=NOT_PROCESSED_CODES | SERVER_ERROR_CODES | {HTTPStatus.BAD_REQUEST})
+IDEMPOTENT = RetryPolicy(retry_codes=NOT_PROCESSED_CODES | SERVER_ERROR_CODES)
+NON_IDEMPOTENT = RetryPolicy(retry_codes=NOT_PROCESSED_CODES | SERVER_ERROR_CODES, idempotent=False, max_tries=3)
+
+# Правила применяются по первому совпадению метода и url.
+RETRY_POLICIES: tuple[tuple[str, re.Pattern, RetryPolicy], ...] = (
+    ("POST", re.compile(r"//cmp\.wildberries\.ru/backend/api/v2/search/save-ad"), NON_IDEMPOTENT),
+    ("POST", re.compile(r"//cmp\.wildberries\.ru/backend/api/v2/search/\d+/budget/deposit"), NON_IDEMPOTENT),
+    ("GET", re.compile(r"//cmp\.wildberries\.ru/"), CMP_READ),
+    ("*", re.compile(r""), IDEMPOTENT),
+)
+
+
+def retry_policy(method: str, url: str) -> RetryPolicy:
+    for policy_method, pattern, policy in RETRY_POLICIES:
+        if policy_method in ("*", method) and pattern.search(url):
+            return policy
+    return IDEMPOTENT
+
+
+class RetryBudget:
+    """Бюджет повторов процесса: не более RETRY_BUDGET_RATIO повторов на запрос
+    плюс RETRY_BUDGET_MIN_PER_SECOND в секунду, чтобы при деградации wildberries
+    повторы не умножали нагрузку на него."""
+
+    def __init__(self) -> None:
+        self._tokens = settings.WBADAPTER.RETRY_BUDGET_MAX
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            settings.WBADAPTER.RETRY_BUDGET_MAX,
+            self._tokens + (now - self._updated) * settings.WBADAPTER.RETRY_BUDGET_MIN_PER_SECOND,
+        )
+        self._updated = now
+
+    def deposit(self) -> None:
+        self._refill()
+        self._tokens = min(settings.WBADAPTER.RETRY_BUDGET_MAX, self._tokens + settings.WBADAPTER.RETRY_BUDGET_RATIO)
+
+    def withdraw(self) -> bool:
+        self._refill()
+        if self._tokens < 1:
+            logger.warning("Retry budget is exhausted.")
+            return False
+        self._tokens -= 1
+        return True
+
+
+retry_budget = RetryBudget()
@@ -0,0 +1,50 @@
+import hashlib
+import uuid
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class WBSession:
+    """Неизменяемые авторизационные данные пользователя для запросов к wildberries.
+
+    Заголовки и cookies собираются один раз при создании сессии, поэтому один экземпляр адаптера
+    может одновременно обслуживать запросы разных пользователей, не храня их токены у себя.
+    """
+
+    headers: tuple[tuple[str, str], ...] = ()
+    cookies: tuple[tuple[str, str], ...] = ()
+    cookie_header: str | None = None
+    user_id: uuid.UUID | None = None
+    supplier_id: str | None = None
+    token_hash: str | None = None
+
+    @classmethod
+    def build(
+        cls,
+        headers: tuple[tuple[str, str], ...],
+        cookies: tuple[tuple[str, str], ...] = (),
+        user_id: uuid.UUID | None = None,
+        supplier_id: str | None = None,
+        token: str | None = None,
+    ) -> "WBSession":
+        return cls(
+            headers=headers,
+            cookies=cookies,
+            cookie_header=render_cookies(cookies) if cookies else None,
+            user_id=user_id,
+            supplier_id=supplier_id,
+            token_hash=token_hash(token) if token else None,
+        )
+
+    @property
+    def scope(self) -> str:
+        """Область авторизации: идентификатор поставщика, хеш токена или anonymous."""
+        return self.supplier_id or self.token_hash or "anonymous"
+
+
+def render_cookies(cookies: tuple[tuple[str, str], ...]) -> str:
+    return "; ".join(f"{name}={value}" for name, value in cookies)
+
+
+def token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,31 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Объединяет одинаковые одновременные запросы в один вызов.
+
+    Пока вызов с ключом key выполняется, остальные вызывающие с тем же ключом ждут его результат
+    (или исключение) вместо повторного обращения к wildberries. Отмена одного из ожидающих
+    не прерывает вызов для остальных.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Future[T]] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future[T]) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Исключение получают ожидающие; здесь оно только помечается обработанным.
+            task.exception()
@@ -5,6 +5,8 @@ from fastapi import status
 from httpx import HTTPStatusError
 from pydantic import ValidationError
 
+from adapters.wb.cache import response_cache
+from adapters.wb.session import WBSession
 from adapters.wb.unofficial.wbadapter import WBAdapterUnofficial
 from adapters.wb.utils import error_for_raise
 from core.settings import logger
@@ -14,16 +16,23 @@ from schemas.v1.base import ResponseCode
 
 
 class AdvertAdapterUnofficial(WBAdapterUnofficial):
-    async def actual_stakes(self, keyword: str) -> ActualStakesDTO:
+    async def actual_stakes(self, keyword: str, session: WBSession | None = None) -> ActualStakesDTO:
         """Метод возвращает список актуальных ставок по ключевой фразе."""
-
+        return await response_cache.get_or_load(
+            name="actual_stakes",
+            key=keyword,
+            model=ActualStakesDTO,
+            loader=lambda: self._actual_stakes(keyword=keyword, session=session),
+        )
+
+    async def _actual_stakes(self, keyword: str, session: WBSession | None = None) -> ActualStakesDTO:
         url = "https://catalog-ads.wildberries.ru/api/v6/search"
         referer = f"https://www.wildberries.ru/catalog/0/search.aspx?search={quote(keyword)}"
 
         headers = {"Referer": referer}
         params = {"keyword": keyword}
         try:
-            result = await self._get(url=url, headers=headers, params=params)
+            result = await self._get(url=url, session=session, headers=headers, params=params, coalesce=True)
         except HTTPStatusError as e:
             raise error_for_raise(
                 status_code=e.response.status_code,
@@ -40,9 +49,16 @@ class AdvertAdapterUnofficial(WBAdapterUnofficial):
                 description="По запросу получены не валидные данные.",
             ) from e
 
-    async def products_by_region(self, dest: str, nm: str) -> ProductsDTO:
+    async def products_by_region(self, dest: str, nm: str, session: WBSession | None = None) -> ProductsDTO:
         """Метод возвращает список продуктов по региону."""
-
+        return await response_cache.get_or_load(
+            name="products_by_region",
+            key=f"{dest}:{nm}",
+            model=ProductsDTO,
+            loader=lambda: self._products_by_region(dest=dest, nm=nm, session=session),
+        )
+
+    async def _products_by_region(self, dest: str, nm: str, session: WBSession | None = None) -> ProductsDTO:
         url = "https://card.wb.ru/cards/list"
         referer = "https://www.wildberries.ru/catalog/0/search.aspx?search"
 
@@ -52,7 +68,7 @@ class AdvertAdapterUnofficial(WBAdapterUnofficial):
             "nm": nm,
         }
         try:
-            result = await self._get(url=url, headers=headers, params=params)
+            result = await self._get(url=url, session=session, headers=headers, params=params, coalesce=True)
         except HTTPStatusError as e:
             raise error_for_raise(
                 status_code=e.response.status_code,
@@ -67,9 +83,28 @@ class AdvertAdapterUnofficial(WBAdapterUnofficial):
             logger.exception("Не удалось обработать результат запроса, полученный от WB.")
             return ProductsDTO()
 
-    async def organic_by_region(self, dest: str, query: str, resultset: str) -> OrganicsDTO:
-        """Метод возвращает список продуктов по региону."""
-
+    async def organic_by_region(
+        self,
+        dest: str,
+        query: str,
+        resultset: str,
+        session: WBSession | None = None,
+    ) -> OrganicsDTO:
+        """Метод возвращает органическую выдачу по региону."""
+        return await response_cache.get_or_load(
+            name="organic_by_region",
+            key=f"{dest}:{resultset}:{query}",
+            model=OrganicsDTO,
+            loader=lambda: self._organic_by_region(dest=dest, query=query, resultset=resultset, session=session),
+        )
+
+    async def _organic_by_region(
+        self,
+        dest: str,
+        query: str,
+        resultset: str,
+        session: WBSession | None = None,
+    ) -> OrganicsDTO:
         url = "https://search.wb.ru/exactmatch/ru/male/v4/search"
         referer = "https://www.wildberries.ru/catalog/0/search.aspx? \
                     search=%D0%B2%D0%B5%D0%BB%D0%BE%D1%81%D0%B8%D0%BF%D0%B5%D0%B4"
@@ -81,7 +116,7 @@ class AdvertAdapterUnofficial(WBAdapterUnofficial):
             "resultset": resultset,
         }
         try:
-            result = await self._get(url=url, headers=headers, params=params)
+            result = await self._get(url=url, session=session, headers=headers, params=params, coalesce=True)
         except HTTPStatusError as e:
             raise error_for_raise(
                 status_code=e.response.status_code,
@@ -100,15 +135,22 @@ class AdvertAdapterUnofficial(WBAdapterUnofficial):
         except KeyError:
             return OrganicsDTO(products=None)
 
-    async def config_values(self) -> ConfigDTO:
+    async def config_values(self, session: WBSession) -> ConfigDTO:
         """Метод возвращает конфигурационные параметры."""
-
+        return await response_cache.get_or_load(
+            name="config_values",
+            key=session.scope,
+            model=ConfigDTO,
+            loader=lambda: self._config_values(session=session),
+        )
+
+    async def _config_values(self, session: WBSession) -> ConfigDTO:
         url = "https://cmp.wildberries.ru/backend/api/v5/configvalues"
         referer = f"https://cmp.wildberries.ru/campaigns/list/active/edit/search/{random.randint(8462916, 9462916)}"
         headers = {"Referer": referer}
         error_desc = "Не удалось получить конфигурационные параметры."
         try:
-            result = await self._get(url=url, headers=headers)
+            result = await self._get(url=url, session=session, headers=headers, coalesce=True)
         except HTTPStatusError as e:
             raise error_for_raise(
                 status_code=e.response.status_code,
@@ -4,35 +4,54 @@ import math
 
 from httpx import HTTPStatusError
 
+from adapters.wb.campaign_index import CampaignMeta, campaign_index
+from adapters.wb.session import WBSession
 from adapters.wb.unofficial.wbadapter import WBAdapterUnofficial
-from adapters.wb.utils import error_for_raise
-from dto.unofficial.campaign import CampaignConfigDTO, CampaignStatus, ReplenishBugetRequestDTO
+from adapters.wb.utils import chunked, error_for_raise
+from core.settings import settings
+from dto.official.advert import CampaignType
+from dto.unofficial.campaign import CampaignConfigDTO, CampaignStatus, ReplenishBugetRequestDTO, SubjectDTO
 from exceptions.base import WBAError
 from exceptions.campaign import CampaignCreateError, CampaignInitError, CampaignStartError
 
 
 class CampaignAdapterUnofficial(WBAdapterUnofficial):
-    async def get_subject_id(self, nms: int) -> int:
-        url: str = "https://card.wb.ru/cards/detail"
+    async def get_subject_ids(self, session: WBSession, nms: list[int]) -> dict[int, int]:
+        """Возвращает subject id для каждого nm.
 
-        params = {"nm": nms}
-        headers = {"Referer": "https://cmp.wildberries.ru/campaigns/create/search"}
-        try:
-            result = await self._get(url=url, headers=headers, params=params)
-            result.raise_for_status()
-        except HTTPStatusError as e:
-            raise error_for_raise(
-                status_code=e.response.status_code,
-                description=f"Ошибка при получении subject id. nms={nms}",
-                error_class=CampaignCreateError,
-            ) from e
-
-        subject_id: int = result.json()["data"]["products"][0]["subjectId"]
-        return subject_id
-
-    async def get_category(self, nms: int) -> str:
-        subject_id: int = await self.get_subject_id(nms=nms)
+        Карточки запрашиваются пачками по CARDS_DETAIL_CHUNK_SIZE nm в одном запросе (nm=1;2;3).
 
+        Raises:
+            CampaignCreateError: wildberries вернул ошибку или не вернул карточку для части nm.
+        """
+        url: str = "https://card.wb.ru/cards/detail"
+        headers = {"Referer": "https://cmp.wildberries.ru/campaigns/create/search"}
+        unique_nms = list(dict.fromkeys(nms))
+        chunks = chunked(unique_nms, settings.WBADAPTER.CARDS_DETAIL_CHUNK_SIZE)
+
+        async def fetch(chunk: list[int]) -> list[dict]:
+            params = {"nm": ";".join(str(nm) for nm in chunk)}
+            try:
+                result = await self._get(url=url, session=session, headers=headers, params=params)
+            except HTTPStatusError as e:
+                raise error_for_raise(
+                    status_code=e.response.status_code,
+                    description=f"Ошибка при получении subject id. nms={chunk}",
+                    error_class=CampaignCreateError,
+                ) from e
+            products: list[dict] = result.json()["data"]["products"]
+            return products
+
+        subject_ids: dict[int, int] = {}
+        for products in await asyncio.gather(*(fetch(chunk) for chunk in chunks)):
+            subject_ids.update({product["id"]: product["subjectId"] for product in products})
+
+        if missing := [nm for nm in unique_nms if nm not in subject_ids]:
+            raise CampaignCreateError(description=f"Не удалось получить subject id. nms={missing}")
+        return subject_ids
+
+    async def get_subjects_index(self, session: WBSession) -> dict[int, str]:
+        """Возвращает названия категорий поставщика по subject id."""
         url = "https://cmp.wildberries.ru/backend/api/v2/search/supplier-subjects"
 
         headers = {"Referer": "https://cmp.wildberries.ru/campaigns/create/search"}
@@ -40,39 +59,57 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
         try:
             result = await self._get(
                 url=url,
+                session=session,
                 headers=headers,
             )
             result.raise_for_status()
         except HTTPStatusError as e:
             raise error_for_raise(
                 status_code=e.response.status_code,
-                description=f"Ошибка при получении category. nms = {nms}",
+                description="Ошибка при получении списка категорий поставщика.",
                 error_class=CampaignCreateError,
             ) from e
 
-        category: str | None = None
-        for item in result.json():
-            if item["id"] == subject_id:
-                category = item["name"]
+        return {item["id"]: item["name"] for item in result.json()}
 
-        if not category:
-            raise CampaignCreateError(
-                status_code=result.status_code,
-                description="Не удалось получить название категории для subject_id={0}".format(subject_id),
-            )
+    async def get_subjects(self, session: WBSession, nms: list[int]) -> dict[int, SubjectDTO]:
+        """Возвращает предмет (subject id и название категории) для каждого nm.
 
-        return category
+        Raises:
+            CampaignCreateError: не удалось определить категорию для части nm.
+        """
+        subject_ids, subjects_index = await asyncio.gather(
+            self.get_subject_ids(session=session, nms=nms),
+            self.get_subjects_index(session=session),
+        )
+
+        subjects: dict[int, SubjectDTO] = {}
+        for nm, subject_id in subject_ids.items():
+            if not (category := subjects_index.get(subject_id)):
+                raise CampaignCreateError(
+                    description="Не удалось получить название категории для subject_id={0}".format(subject_id),
+                )
+            subjects[nm] = SubjectDTO(id=subject_id, name=category)
+        return subjects
 
     async def create_campaign(
         self,
+        session: WBSession,
         name: str,
         nms: list[int],
+        subjects: dict[int, SubjectDTO] | None = None,
     ) -> int:
-        """Создает рекламную кампанию."""
-        kw_nms = collections.defaultdict(list)
+        """Создает рекламную кампанию в поиске.
+
+        Arguments:
+            subjects -- уже известные предметы nm (см. get_subjects); недостающие запрашиваются у wildberries.
+        """
+        if subjects is None or any(nm not in subjects for nm in nms):
+            subjects = await self.get_subjects(session=session, nms=nms)
 
-        for kw, nms_ in [(await self.get_category(nms=item), item) for item in nms]:
-            kw_nms[kw].append(nms_)
+        kw_nms = collections.defaultdict(list)
+        for nm in nms:
+            kw_nms[subjects[nm].name].append(nm)
 
         url = "https://cmp.wildberries.ru/backend/api/v2/search/save-ad"
         body = {
@@ -82,7 +119,7 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
         headers = {"Referer": "https://cmp.wildberries.ru/campaigns/create/search"}
 
         try:
-            result = await self._post(url=url, body=body, headers=headers)
+            result = await self._post(url=url, session=session, body=body, headers=headers)
             result.raise_for_status()
         except HTTPStatusError as e:
             raise error_for_raise(
@@ -91,10 +128,16 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
                 error_class=CampaignCreateError,
             ) from e
 
-        return int(result.json()["id"])
+        wb_campaign_id = int(result.json()["id"])
+        # param первой группы кампании - subjectId первого nm (см. services.advert).
+        await campaign_index.remember(
+            wb_campaign_id, CampaignMeta(type=CampaignType.SEARCH, subject_id=subjects[nms[0]].id)
+        )
+        return wb_campaign_id
 
     async def get_campaign_budget(
         self,
+        session: WBSession,
         id: int,
     ) -> int:
         """Возвращает текущий размер бюджета рекламной кампании."""
@@ -103,7 +146,7 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
         headers = {"Referer": f"https://cmp.wildberries.ru/campaigns/list/active/edit/search/{id}"}
 
         try:
-            result = await self._get(url=url, headers=headers)
+            result = await self._get(url=url, session=session, headers=headers)
             result.raise_for_status()
             total = int(result.json()["total"])
             if isinstance(total, int):
@@ -118,6 +161,7 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
 
     async def add_keywords_to_campaign(
         self,
+        session: WBSession,
         id: int,
         keywords: list,
     ) -> None:
@@ -128,7 +172,7 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
 
         body = {"pluse": keywords}
         try:
-            result = await self._post(url=url, body=body, headers=headers)
+            result = await self._post(url=url, session=session, body=body, headers=headers)
             result.raise_for_status()
         except HTTPStatusError as e:
             raise error_for_raise(
@@ -139,6 +183,7 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
 
     async def switch_on_fixed_list(
         self,
+        session: WBSession,
         id: int,
     ) -> None:
         """Включает использование фиксированных фраз в рекламной кампании."""
@@ -146,7 +191,7 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
         headers = {"Referer": f"https://cmp.wildberries.ru/campaigns/list/all/edit/search/{id}"}
 
         try:
-            result = await self._get(url=url, headers=headers)
+            result = await self._get(url=url, session=session, headers=headers)
             result.raise_for_status()
         except HTTPStatusError as e:
             raise error_for_raise(
@@ -155,29 +200,39 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
                 error_class=CampaignInitError,
             ) from e
 
-    async def replenish_budget(self, replenish: ReplenishBugetRequestDTO) -> None:
-        """Увеличивает бюджет кампании до заданного значения с округлением в большую сторону."""
+    async def replenish_budget(self, session: WBSession, replenish: ReplenishBugetRequestDTO) -> int:
+        """Увеличивает бюджет кампании до заданного значения с округлением в большую сторону.
+
+        Returns:
+            Бюджет кампании после пополнения, полученный от wildberries.
+        """
         url: str = f"https://cmp.wildberries.ru/backend/api/v2/search/{replenish.wb_campaign_id}/budget/deposit"
         headers = {
             "Referer": f"https://cmp.wildberries.ru/campaigns/list/active/edit/search/{replenish.wb_campaign_id}"
         }
 
-        budget_amount: int = await self.get_campaign_budget(id=replenish.wb_campaign_id)
+        budget_amount: int = await self.get_campaign_budget(session=session, id=replenish.wb_campaign_id)
         new_budget_amount: int = replenish.amount
 
         if budget_amount >= new_budget_amount:
-            return
+            return budget_amount
 
         if budget_amount != 0:
             new_budget_amount = max(100, math.ceil(budget_amount / 50) * 50)
 
         body = {"sum": new_budget_amount, "type": replenish.type}
 
+        async def deposit_not_applied() -> bool:
+            # Повторное пополнение допустимо, только если бюджет не изменился после неудачной попытки.
+            return await self.get_campaign_budget(session=session, id=replenish.wb_campaign_id) == budget_amount
+
         try:
             await self._post(
                 url=url,
+                session=session,
                 body=body,
                 headers=headers,
+                guard=deposit_not_applied,
             )
         except HTTPStatusError as e:
             raise error_for_raise(
@@ -185,8 +240,10 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
                 description=f"Ошибка при добавлении бюджета кампании. body={body}",
                 error_class=CampaignInitError,
             ) from e
+        # Бюджет читается заново: wildberries может округлить сумму или применить пополнение из повтора запроса.
+        return await self.get_campaign_budget(session=session, id=replenish.wb_campaign_id)
 
-    async def replenish_budget_at(self, replenish: ReplenishBugetRequestDTO) -> None:
+    async def replenish_budget_at(self, session: WBSession, replenish: ReplenishBugetRequestDTO) -> None:
         """Увеличивает бюджет кампании на X рублей."""
         url: str = f"https://cmp.wildberries.ru/backend/api/v2/search/{replenish.wb_campaign_id}/budget/deposit"
         headers = {
@@ -198,6 +255,7 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
         try:
             await self._post(
                 url=url,
+                session=session,
                 body=body,
                 headers=headers,
             )
@@ -208,13 +266,13 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
                 error_class=WBAError,
             ) from e
 
-    async def get_campaign_config(self, id: int) -> CampaignConfigDTO:
+    async def get_campaign_config(self, session: WBSession, id: int) -> CampaignConfigDTO:
         """Возвращает текущию конфигурацию компании."""
         url: str = f"https://cmp.wildberries.ru/backend/api/v2/search/{id}/placement"
         headers = {"Referer": f"https://cmp.wildberries.ru/campaigns/list/active/edit/search/{id}"}
 
         try:
-            result = await self._get(url=url, headers=headers)
+            result = await self._get(url=url, session=session, headers=headers)
             return CampaignConfigDTO.parse_obj(result.json())
         except HTTPStatusError as e:
             raise error_for_raise(
@@ -223,11 +281,13 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
                 error_class=WBAError,
             ) from e
 
-    async def start_campaign(self, id: int) -> None:
+    async def start_campaign(self, session: WBSession, id: int, budget: int | None = None) -> None:
         """Запускает рекламную кампанию.
 
         Arguments:
-            id -- идентификатор кампании
+            id -- идентификатор кампании,
+            budget -- текущий бюджет кампании, если он уже известен (например, после replenish_budget);
+                иначе бюджет запрашивается одновременно с конфигурацией кампании.
 
         Raises:
             CampaignStartError.init: Ошибка запуска кампании.
@@ -236,15 +296,20 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
 
         headers = {"Referer": f"https://cmp.wildberries.ru/campaigns/list/all/edit/search/{id}"}
 
-        budget_amount: int = await self.get_campaign_budget(id=id)
-        await asyncio.sleep(0.5)
-        config: CampaignConfigDTO = await self.get_campaign_config(id=id)
+        config: CampaignConfigDTO
+        if budget is None:
+            budget_amount, config = await asyncio.gather(
+                self.get_campaign_budget(session=session, id=id),
+                self.get_campaign_config(session=session, id=id),
+            )
+        else:
+            budget_amount = budget
+            config = await self.get_campaign_config(session=session, id=id)
         config.budget.total = budget_amount
-        # Задержка, чтобы избежать - too many requests (429)
-        await asyncio.sleep(0.5)
         try:
             await self._put(
                 url=url,
+                session=session,
                 body=config.dict(),
                 headers=headers,
             )
@@ -255,7 +320,33 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
                 error_class=CampaignStartError,
             ) from e
 
-    async def update_campaign_config(self, id: int, config: CampaignConfigDTO) -> None:
+    async def start_campaigns(
+        self, session: WBSession, ids: list[int], budgets: dict[int, int] | None = None
+    ) -> dict[int, Exception]:
+        """Запускает несколько кампаний поставщика одновременно.
+
+        Частоту запросов ограничивает adapters.wb.ratelimit.
+
+        Arguments:
+            budgets -- уже известные бюджеты кампаний по id.
+
+        Returns:
+            Ошибки запуска по id кампаний; кампании без ошибок запущены.
+        """
+        budgets = budgets or {}
+        results = await asyncio.gather(
+            *(self.start_campaign(session=session, id=id, budget=budgets.get(id)) for id in ids),
+            return_exceptions=True,
+        )
+        errors: dict[int, Exception] = {}
+        for id, result in zip(ids, results):
+            if isinstance(result, Exception):
+                errors[id] = result
+            elif isinstance(result, BaseException):
+                raise result
+        return errors
+
+    async def update_campaign_config(self, session: WBSession, id: int, config: CampaignConfigDTO) -> None:
         """Обновляет конфигурацию кампании.
 
         Arguments:
@@ -269,6 +360,7 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
         try:
             await self._put(
                 url=url,
+                session=session,
                 body=config.dict(),
                 headers=headers,
             )
@@ -279,7 +371,7 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
                 error_class=WBAError,
             ) from e
 
-    async def update_campaign_rate(self, id: int, config: CampaignConfigDTO) -> None:
+    async def update_campaign_rate(self, session: WBSession, id: int, config: CampaignConfigDTO) -> None:
         """Устанавливает новое значение ставки рекламной кампании.
 
         Arguments:
@@ -293,6 +385,7 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
         try:
             await self._put(
                 url=url,
+                session=session,
                 body=config.dict(),
                 headers=headers,
             )
@@ -303,7 +396,7 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
                 error_class=WBAError,
             ) from e
 
-    async def pause_campaign(self, id: int) -> CampaignStatus:
+    async def pause_campaign(self, session: WBSession, id: int) -> CampaignStatus:
         """Ставит рекламную кампанию на паузу.
 
         Arguments:
@@ -319,6 +412,7 @@ class CampaignAdapterUnofficial(WBAdapterUnofficial):
         try:
             await self._get(
                 url=url,
+                session=session,
                 headers=headers,
             )
         except HTTPStatusError as e:
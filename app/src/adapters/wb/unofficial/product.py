@@ -2,6 +2,7 @@ from fastapi import status
 from httpx import HTTPStatusError
 from pydantic import ValidationError, parse_obj_as
 
+from adapters.wb.session import WBSession
 from adapters.wb.unofficial.wbadapter import WBAdapterUnofficial
 from adapters.wb.utils import error_for_raise
 from core.settings import logger
@@ -10,7 +11,7 @@ from exceptions.base import WBAError
 
 
 class ProductAdapter(WBAdapterUnofficial):
-    async def products(self) -> ProductsDTO:
+    async def products(self, session: WBSession) -> ProductsDTO:
         """Метод возвращает список продуктовых карточек пользователя."""
 
         url = "https://seller-content.wildberries.ru/ns/viewer/content-card/viewer/tableListv4"
@@ -19,7 +20,7 @@ class ProductAdapter(WBAdapterUnofficial):
         headers = {"Referer": referer}
         body = ProductRequestBodyDTO().dict()
         try:
-            result = await self._post(url=url, headers=headers, body=body)
+            result = await self._post(url=url, session=session, headers=headers, body=body)
         except HTTPStatusError as e:
             raise error_for_raise(
                 status_code=e.response.status_code,
@@ -36,12 +37,12 @@ class ProductAdapter(WBAdapterUnofficial):
                 description=f"Не удалось обработать результат запроса продуктовых карточек. result={result.json()}",
             ) from e
 
-    async def categories(self) -> CategoriesDTO:
+    async def categories(self, session: WBSession) -> CategoriesDTO:
         url = "https://cmp.wildberries.ru/backend/api/v2/search/supplier-subjects"
         headers = {"Referer": "https://cmp.wildberries.ru/campaigns/create/search"}
 
         try:
-            result = await self._get(url=url, headers=headers)
+            result = await self._get(url=url, session=session, headers=headers)
         except HTTPStatusError as e:
             raise error_for_raise(
                 status_code=e.response.status_code,
@@ -51,7 +52,7 @@ class ProductAdapter(WBAdapterUnofficial):
         categories = parse_obj_as(list[CategoryDTO], result.json())
         return CategoriesDTO(categories=categories)
 
-    async def products_by_subject(self, subject_id: int) -> ProductsSubjectDTO:
+    async def products_by_subject(self, session: WBSession, subject_id: int) -> ProductsSubjectDTO:
         """Метод возвращает список продуктовых карточек пользователя по subject_id."""
 
         url = "https://cmp.wildberries.ru/backend/api/v2/search/products"
@@ -60,7 +61,7 @@ class ProductAdapter(WBAdapterUnofficial):
         headers = {"Referer": referer}
         params = {"subject": subject_id}
         try:
-            result = await self._get(url=url, headers=headers, params=params)
+            result = await self._get(url=url, session=session, headers=headers, params=params)
         except HTTPStatusError as e:
             raise error_for_raise(
                 status_code=e.response.status_code,
@@ -14,21 +14,20 @@ class SupplierAdapter(WBAdapterUnofficial):
         Returns:
             wb_token_access: str
         """
-        self.wb_token_refresh = wb_token_refresh
-        self.wb_x_supplier_id_external: str = str(wb_x_supplier_id_external)
-        token = await self._wb_grant()
-        wb_token_access: str = await self._wb_login(token)
-        await self._wb_introspect(wb_token_access=wb_token_access)
+        supplier_id: str = str(wb_x_supplier_id_external)
+        token = await self._wb_grant(wb_token_refresh=wb_token_refresh, supplier_id=supplier_id)
+        wb_token_access: str = await self._wb_login(token=token, supplier_id=supplier_id)
+        await self._wb_introspect(wb_token_access=wb_token_access, supplier_id=supplier_id)
         return wb_token_access
 
-    async def _wb_grant(self) -> str:
+    async def _wb_grant(self, wb_token_refresh: str, supplier_id: str) -> str:
         url: str = "https://passport.wildberries.ru/api/v2/auth/grant"
         referer: str = "https://cmp.wildberries.ru/"
         try:
             headers = {"Referer": referer}
             cookies: dict = {
-                "WBToken": self.wb_token_refresh,
-                "x-supplier-id-external": self.wb_x_supplier_id_external,
+                "WBToken": wb_token_refresh,
+                "x-supplier-id-external": supplier_id,
             }
             result: Response = await self._post(url=url, cookies=cookies, headers=headers)
         except HTTPStatusError as e:
@@ -39,13 +38,13 @@ class SupplierAdapter(WBAdapterUnofficial):
         token: str = result.json()["token"]
         return token
 
-    async def _wb_login(self, token: str) -> str:
+    async def _wb_login(self, token: str, supplier_id: str) -> str:
         url: str = "https://cmp.wildberries.ru/passport/api/v2/auth/login"
         referer: str = "https://cmp.wildberries.ru/campaigns/list/all?type=auction"
         try:
             headers = {"Referer": referer}
             cookies: dict = {
-                "x-supplier-id-external": self.wb_x_supplier_id_external,
+                "x-supplier-id-external": supplier_id,
             }
             body = {
                 "token": token,
@@ -66,14 +65,14 @@ class SupplierAdapter(WBAdapterUnofficial):
             ) from exc
         return wb_token_access
 
-    async def _wb_introspect(self, wb_token_access: str) -> None:
+    async def _wb_introspect(self, wb_token_access: str, supplier_id: str) -> None:
         url: str = "https://cmp.wildberries.ru/passport/api/v2/auth/introspect"
         referer: str = "https://cmp.wildberries.ru/campaigns/list/all?type=auction"
 
         try:
             headers = {"Referer": referer}
             cookies: dict = {
-                "x-supplier-id-external": self.wb_x_supplier_id_external,
+                "x-supplier-id-external": supplier_id,
                 "WBToken": wb_token_access,
             }
             await self._get(url=url, cookies=cookies, headers=headers)
@@ -1,76 +1,50 @@
+import uuid
+from functools import lru_cache
+
 import fake_useragent as fk_ua
-import httpx
 
+from adapters.wb.session import WBSession
 from adapters.wb.wbadapter import BaseWBAdapter
-from dto.token import UnofficialUserAuthDataDTO, UserAuthDataBase
+from core.settings import settings
+from dto.token import UnofficialUserAuthDataDTO
 
 browsers = ["chrome", "opera", "firefox", "edge"]
 
+ua: fk_ua.FakeUserAgent = fk_ua.UserAgent(browsers=browsers)
+
+
+@lru_cache(maxsize=settings.WBADAPTER.SESSION_CACHE_SIZE)
+def _unofficial_session(
+    user_id: uuid.UUID | None,
+    wb_user_id: int,
+    wb_supplier_id: str,
+    wb_token_access: str,
+) -> WBSession:
+    return WBSession.build(
+        headers=(
+            ("User-Agent", ua.random),
+            ("X-User-Id", str(wb_user_id)),
+        ),
+        cookies=(
+            ("x-supplier-id-external", wb_supplier_id),
+            ("WBToken", wb_token_access),
+        ),
+        user_id=user_id,
+        supplier_id=wb_supplier_id,
+        token=wb_token_access,
+    )
 
-class WBAdapterUnofficial(BaseWBAdapter):
-    def __init__(self, http_client: httpx.AsyncClient):
-        super().__init__(http_client=http_client)
-        self.ua: fk_ua.FakeUserAgent = fk_ua.UserAgent(browsers=browsers)
-        self.headers: dict[str, str] = {
-            "User-Agent": self.ua.random,
-        }
-        self.cookies: dict = {}
-        self._auth_data: UnofficialUserAuthDataDTO | None = None
-
-    @property
-    def auth_data(self) -> UserAuthDataBase | None:
-        return self._auth_data
-
-    @auth_data.setter
-    def auth_data(self, auth_data: UnofficialUserAuthDataDTO) -> None:
-        self._auth_data = auth_data
-        self.headers["X-User-Id"] = str(auth_data.wb_user_id)
-        self.cookies["x-supplier-id-external"] = auth_data.wb_supplier_id
-        self.cookies["WBToken"] = auth_data.wb_token_access
-
-    async def _post(
-        self,
-        url: str,
-        headers: dict | None = None,
-        cookies: dict | None = None,
-        body: dict | None = None,
-    ) -> httpx.Response:
-        headers = headers or {}
-        cookies = cookies or {}
-        headers |= self.headers
-        cookies |= self.cookies
 
-        body = body or {}
-        response: httpx.Response = await super()._post(url, headers, cookies, body)
-        return response
-
-    async def _put(
-        self,
-        url: str,
-        headers: dict | None = None,
-        cookies: dict | None = None,
-        body: dict | None = None,
-    ) -> httpx.Response:
-        headers = headers or {}
-        cookies = cookies or {}
-        headers |= self.headers
-        cookies |= self.cookies
-        body = body or {}
-        response: httpx.Response = await super()._put(url, headers, cookies, body)
-        return response
-
-    async def _get(
-        self,
-        url: str,
-        headers: dict | None = None,
-        cookies: dict | None = None,
-        params: dict | None = None,
-    ) -> httpx.Response:
-        headers = headers or {}
-        cookies = cookies or {}
-        params = params or {}
-        headers |= self.headers
-        cookies |= self.cookies
-
-        response: httpx.Response = await super()._get(url, headers, cookies, params)
-        return response
+class WBAdapterUnofficial(BaseWBAdapter):
+    @staticmethod
+    def session(auth_data: UnofficialUserAuthDataDTO, user_id: uuid.UUID | None = None) -> WBSession:
+        """Возвращает сессию личного кабинета для пользователя (кешируется по user_id и токену)."""
+        return _unofficial_session(
+            user_id,
+            auth_data.wb_user_id,
+            auth_data.wb_supplier_id,
+            auth_data.wb_token_access,
+        )
+
+    def _anonymous_session(self) -> WBSession:
+        return WBSession.build(headers=(("User-Agent", ua.random),))
@@ -1,7 +1,10 @@
 from http import HTTPStatus
+from typing import Sequence, TypeVar
 
 from exceptions.base import WBAError, WBAErrorNotAuth
 
+T = TypeVar("T")
+
 
 def error_for_raise(
     status_code: int,
@@ -20,3 +23,12 @@ def error_for_raise(
         description=description,
     )
     return error
+
+
+def chunked(items: Sequence[T], size: int) -> list[list[T]]:
+    """Разбивает последовательность на части не длиннее size."""
+    chunks: list[list[T]] = []
+    for start in range(0, len(items), size):
+        stop = start + size
+        chunks.append(list(items[start:stop]))
+    return chunks
@@ -1,39 +1,34 @@
-import contextlib
-import json
+import asyncio
 import random
+import time
 from http import HTTPStatus
-from urllib.parse import unquote
+from typing import Awaitable, Callable
+from urllib.parse import urlsplit
 
-import backoff
 import httpx
 
-from core.settings import logger, settings
-from dto.token import UserAuthDataBase
+from adapters.auth_cache import auth_cache
+from adapters.wb.circuit_breaker import circuit_breaker
+from adapters.wb.ratelimit import rate_limiter
+from adapters.wb.retry import retry_budget, retry_policy
+from adapters.wb.session import WBSession, render_cookies
+from adapters.wb.singleflight import SingleFlight
+from core.http import HttpClients, log_response_body
+from core.settings import logger
+from core.utils.timing import job_timings
 
-RETRY_CODES = [HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.BAD_REQUEST]
+ANONYMOUS_SESSION = WBSession()
 
+# Проверка перед повтором неидемпотентного запроса: True, если предыдущая попытка не была применена.
+RetryGuard = Callable[[], Awaitable[bool]]
 
-def retry_then_5xx(e: Exception) -> bool:
-    status = e.response.status_code  # type: ignore[attr-defined]
-    return not (status in RETRY_CODES or (500 <= status < 600))
+# Одинаковые одновременные GET-запросы (url, параметры, область авторизации) выполняются один раз.
+get_flights: SingleFlight[httpx.Response] = SingleFlight()
 
 
 class BaseWBAdapter:
-    def __init__(self, http_client: httpx.AsyncClient):
-        self.http_client = http_client
-        self.http_client.event_hooks = {
-            "request": [self._log_request],
-            "response": [self._log_response],
-        }
-        self._auth_data: UserAuthDataBase | None = None
-
-    @property
-    def auth_data(self) -> UserAuthDataBase | None:
-        return self._auth_data
-
-    @auth_data.setter
-    def auth_data(self, auth_data: UserAuthDataBase) -> None:
-        self._auth_data = auth_data
+    def __init__(self, http_clients: HttpClients):
+        self.http_clients = http_clients
 
     @staticmethod
     def random_device() -> str:
@@ -53,106 +48,162 @@ class BaseWBAdapter:
         string = string.replace("\n", "")
         return "{0} {1}".format(string[:length], "..." * (len(string) > length))
 
-    async def _log_request(self, request: httpx.Request) -> None:
-        content: str = request.content.decode("utf-8")
+    def _anonymous_session(self) -> WBSession:
+        return ANONYMOUS_SESSION
 
-        with contextlib.suppress(ValueError):
-            content = json.loads(content)
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        session: WBSession | None = None,
+        headers: dict | None = None,
+        cookies: dict | None = None,
+        params: dict | None = None,
+        body: dict | None = None,
+        guard: RetryGuard | None = None,
+    ) -> httpx.Response:
+        """Выполняет запрос к wildberries, повторяя его по правилам из adapters.wb.retry.
+
+        Raises:
+            httpx.HTTPStatusError: ответ с ошибкой, после которого повтор не разрешен.
+            WBUnavailableError: хост wildberries отключен автоматом защиты (adapters.wb.circuit_breaker).
+        """
+        session = session or self._anonymous_session()
+        policy = retry_policy(method, url)
+        deadline = time.monotonic() + policy.max_time
+        host = urlsplit(url).hostname or ""
+        attempt = 1
+        # Результат последней отправленной попытки: автомат защиты учитывает запрос вместе с повторами один раз.
+        failed: bool | None = None
+        retry_budget.deposit()
+        try:
+            while True:
+                try:
+                    response = await self._send(method, url, session, headers, cookies, params, body)
+                except httpx.TransportError:
+                    failed = True
+                    raise
+                failed = response.is_server_error
+                try:
+                    response.raise_for_status()
+                    break
+                except httpx.HTTPStatusError:
+                    status_code = response.status_code
+                    if status_code in (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN) and session.user_id:
+                        # Токен пользователя больше не действует: следующий запрос получит данные из token manager.
+                        await auth_cache.invalidate(session.user_id)
+                    if status_code not in policy.retry_codes or attempt >= policy.max_tries:
+                        raise
+                    delay = policy.delay(attempt, response)
+                    if time.monotonic() + delay > deadline:
+                        raise
+                    if policy.need_guard(status_code) and (guard is None or not await guard()):
+                        raise
+                    # Бюджет списывается последним: повтор, запрещенный проверкой, не расходует его.
+                    if not retry_budget.withdraw():
+                        raise
+                    logger.info(f"Retry {method} {url} after {status_code} in {delay:.2f}s, attempt {attempt}.")
+                    if timings := job_timings.get():
+                        timings.retry(delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+        except Exception:
+            if failed is not None:
+                await self._record_outcome(host, failed)
+            raise
+        await self._record_outcome(host, failed=False)
+        return response
 
-        logger.debug(
-            "Request {0}: {1}, data: {2}".format(
-                request.method,
-                unquote(str(request.url)),
-                str(content),
-            )
-        )
+    @staticmethod
+    async def _record_outcome(host: str, failed: bool) -> None:
+        if failed:
+            await circuit_breaker.on_failure(host)
+        else:
+            await circuit_breaker.on_success(host)
 
-    async def _log_response(self, response: httpx.Response) -> None:
-        request = response.request
-        content: str = (await response.aread()).decode("utf-8").strip()
-        logger.debug(
-            "Response {0}: {1}, status: {2}, data: {3}".format(
-                request.method,
-                unquote(str(request.url)),
-                response.status_code,
-                content,
-            )
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        session: WBSession,
+        headers: dict | None,
+        cookies: dict | None,
+        params: dict | None,
+        body: dict | None,
+    ) -> httpx.Response:
+        request_headers: list[tuple[str, str]] = list(session.headers)
+        if headers:
+            request_headers.extend(headers.items())
+
+        cookie_header = session.cookie_header
+        if cookies:
+            cookie_header = render_cookies((*session.cookies, *cookies.items()))
+        if cookie_header:
+            request_headers.append(("Cookie", cookie_header))
+
+        host = urlsplit(url).hostname or ""
+        # Анонимные запросы ограничиваются только общим лимитом хоста.
+        scope = session.supplier_id or session.token_hash
+        group = self.http_clients.family(url).value
+        await circuit_breaker.before_request(host)
+        waited = await rate_limiter.acquire(host, scope, group)
+        if waited and (timings := job_timings.get()):
+            timings.wait(waited)
+        response: httpx.Response = await self.http_clients.for_url(url).request(
+            method=method,
+            url=url,
+            headers=request_headers,
+            params=params,
+            json=body,
         )
+        await rate_limiter.feedback(host, scope, response, group)
+        log_response_body(response)
+        return response
 
-    @backoff.on_exception(
-        backoff.fibo,
-        exception=httpx.HTTPStatusError,
-        max_time=settings.WBADAPTER.MAX_RETRY_TIME,
-        giveup=retry_then_5xx,
-        jitter=None,
-    )
     async def _post(
         self,
         url: str,
+        session: WBSession | None = None,
         headers: dict | None = None,
         cookies: dict | None = None,
         body: dict | None = None,
+        guard: RetryGuard | None = None,
     ) -> httpx.Response:
-        headers = headers or {}
-        cookies = cookies or {}
-        body = body or {}
-        response: httpx.Response = await self.http_client.post(
-            url=url,
-            headers=headers,
-            cookies=cookies,
-            json=body,
+        return await self._request(
+            "POST", url, session=session, headers=headers, cookies=cookies, body=body or {}, guard=guard
         )
-        response.raise_for_status()
-        return response
 
-    @backoff.on_exception(
-        backoff.fibo,
-        exception=httpx.HTTPStatusError,
-        max_time=settings.WBADAPTER.MAX_RETRY_TIME,
-        giveup=retry_then_5xx,
-        jitter=None,
-    )
     async def _put(
         self,
         url: str,
+        session: WBSession | None = None,
         headers: dict | None = None,
         cookies: dict | None = None,
         body: dict | None = None,
     ) -> httpx.Response:
-        headers = headers or {}
-        cookies = cookies or {}
-        body = body or {}
-        response: httpx.Response = await self.http_client.put(
-            url=url,
-            headers=headers,
-            cookies=cookies,
-            json=body,
-        )
-        response.raise_for_status()
-        return response
+        return await self._request("PUT", url, session=session, headers=headers, cookies=cookies, body=body or {})
 
-    @backoff.on_exception(
-        backoff.fibo,
-        exception=httpx.HTTPStatusError,
-        max_time=settings.WBADAPTER.MAX_RETRY_TIME,
-        giveup=retry_then_5xx,
-        jitter=None,
-    )
     async def _get(
         self,
         url: str,
+        session: WBSession | None = None,
         headers: dict | None = None,
         cookies: dict | None = None,
         params: dict | None = None,
+        coalesce: bool = False,
     ) -> httpx.Response:
-        headers = headers or {}
-        cookies = cookies or {}
-        params = params or {}
-        response: httpx.Response = await self.http_client.get(
-            url=url,
-            headers=headers,
-            cookies=cookies,
-            params=params,
+        """GET-запрос к wildberries.
+
+        Arguments:
+            coalesce -- объединять с одинаковыми одновременными запросами; допустимо, только если
+                ответ не зависит от заголовков и cookies, переданных помимо сессии.
+        """
+        if not coalesce:
+            return await self._request("GET", url, session=session, headers=headers, cookies=cookies, params=params)
+
+        session = session or self._anonymous_session()
+        key = (url, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items())), session.scope)
+        return await get_flights.do(
+            key,
+            lambda: self._request("GET", url, session=session, headers=headers, cookies=cookies, params=params),
         )
-        response.raise_for_status()
-        return response
@@ -5,7 +5,7 @@ from arq.connections import RedisSettings
 from core.settings import log_config, logger, settings
 from depends import shutdown as sd
 from depends import startup as su
-from tasks import tasks
+from tasks import cron_jobs, tasks
 
 
 async def startup(ctx: dict) -> None:
@@ -21,6 +21,7 @@ async def shutdown(ctx: dict) -> None:
 
 class WorkerSettings:
     functions = tasks
+    cron_jobs = cron_jobs
     on_startup = startup
     on_shutdown = shutdown
     redis_settings = RedisSettings(host=settings.REDIS.HOST, port=settings.REDIS.PORT, database=1)
@@ -0,0 +1,163 @@
+import itertools
+import logging
+from enum import Enum
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from urllib.parse import unquote, urlsplit
+
+import httpx
+
+from core.settings import logger, settings
+
+# Хосты личного кабинета продавца (cmp, seller, passport), требующие cookies пользователя.
+CMP_HOSTS = frozenset(
+    {
+        "cmp.wildberries.ru",
+        "seller.wildberries.ru",
+        "seller-content.wildberries.ru",
+        "passport.wildberries.ru",
+    }
+)
+
+
+class HostFamily(str, Enum):
+    """Группа upstream-хостов wildberries, для которой держится отдельный пул соединений.
+
+    Values:
+        official - официальное API (advert-api.wb.ru),
+        cmp - личный кабинет продавца (cmp.wildberries.ru и др.),
+        public - публичные хосты каталога и поиска (card.wb.ru, search.wb.ru, catalog-ads.wildberries.ru).
+    """
+
+    OFFICIAL = "official"
+    CMP = "cmp"
+    PUBLIC = "public"
+
+
+# Метка в request.extensions: запрос попал в выборку для debug-логирования.
+LOG_EXTENSION = "wba_log"
+
+_log_counter = itertools.count()
+
+
+def _cut(content: bytes) -> str:
+    limit = settings.WBADAPTER.HTTP_LOG_BODY_LIMIT
+    text = content[:limit].decode("utf-8", errors="replace").replace("\n", "")
+    return f"{text}..." if len(content) > limit else text
+
+
+async def log_request(request: httpx.Request) -> None:
+    if next(_log_counter) % settings.WBADAPTER.HTTP_LOG_SAMPLE_RATE:
+        return
+    request.extensions = {**request.extensions, LOG_EXTENSION: True}
+    logger.debug("Request %s: %s, data: %s", request.method, unquote(str(request.url)), _cut(request.content))
+
+
+async def log_response(response: httpx.Response) -> None:
+    """Логирует статус ответа, не вычитывая тело: его логирует log_response_body после чтения вызывающим кодом."""
+    request = response.request
+    if not request.extensions.get(LOG_EXTENSION):
+        return
+    logger.debug(
+        "Response headers %s: %s, status: %s, content-length: %s",
+        request.method,
+        unquote(str(request.url)),
+        response.status_code,
+        response.headers.get("content-length"),
+    )
+
+
+def log_response_body(response: httpx.Response) -> None:
+    """Логирует начало уже прочитанного тела ответа для запросов из выборки."""
+    request = response.request
+    if not request.extensions.get(LOG_EXTENSION) or not response.is_stream_consumed:
+        return
+    logger.debug(
+        "Response %s: %s, status: %s, data: %s",
+        request.method,
+        unquote(str(request.url)),
+        response.status_code,
+        _cut(response.content),
+    )
+
+
+class HttpClients:
+    """Реестр долгоживущих httpx-клиентов, по одному клиенту на группу хостов и клиент token manager.
+
+    Создается один раз при старте приложения (или arq воркера) и закрывается при остановке,
+    поэтому адаптеры переиспользуют уже установленные TCP/TLS соединения.
+    """
+
+    def __init__(self) -> None:
+        self.official_host: str = urlsplit(settings.WBADAPTER.WB_OFFICIAL_API_ADV_URL).hostname or ""
+        self._clients: dict[HostFamily, httpx.AsyncClient] = {
+            family: self._build_client(proxy_url=self._proxy_url(family)) for family in HostFamily
+        }
+        self.token_manager: httpx.AsyncClient = self._build_token_manager_client()
+
+    @staticmethod
+    def _proxy_url(family: HostFamily) -> str | None:
+        if not settings.WBADAPTER.PROXY_URL:
+            return None
+        if family is HostFamily.OFFICIAL and not settings.WBADAPTER.OFFICIAL_API_VIA_PROXY:
+            return None
+        return str(settings.WBADAPTER.PROXY_URL)
+
+    @staticmethod
+    def _build_client(proxy_url: str | None) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=settings.WBADAPTER.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.WBADAPTER.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.WBADAPTER.HTTP_KEEPALIVE_EXPIRY,
+        )
+        transport = httpx.AsyncHTTPTransport(
+            retries=settings.WBADAPTER.HTTP_TRANSPORT_RETRIES,
+            limits=limits,
+            proxy=httpx.Proxy(proxy_url) if proxy_url else None,
+        )
+        # Клиент общий для всех пользователей, поэтому cookies из ответов wildberries
+        # (например, WBToken) не должны сохраняться в нем между запросами.
+        cookies = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+        # Хуки логирования ставятся только при уровне DEBUG, иначе запросы не несут их накладных расходов.
+        event_hooks: dict[str, list] = {}
+        if logger.isEnabledFor(logging.DEBUG):
+            event_hooks = {
+                "request": [log_request],
+                "response": [log_response],
+            }
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=settings.WBADAPTER.HTTP_TIMEOUT,
+            cookies=cookies,
+            event_hooks=event_hooks,
+        )
+
+    @staticmethod
+    def _build_token_manager_client() -> httpx.AsyncClient:
+        """Клиент внутреннего сервиса token manager: без прокси и без логирования (в ответах токены)."""
+        limits = httpx.Limits(
+            max_connections=settings.WBADAPTER.TOKEN_MANAGER_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.WBADAPTER.TOKEN_MANAGER_MAX_CONNECTIONS,
+            keepalive_expiry=settings.WBADAPTER.HTTP_KEEPALIVE_EXPIRY,
+        )
+        transport = httpx.AsyncHTTPTransport(
+            retries=settings.WBADAPTER.HTTP_TRANSPORT_RETRIES,
+            limits=limits,
+            http2=settings.WBADAPTER.TOKEN_MANAGER_HTTP2,
+        )
+        return httpx.AsyncClient(transport=transport)
+
+    def family(self, url: str) -> HostFamily:
+        host = urlsplit(url).hostname or ""
+        if host == self.official_host:
+            return HostFamily.OFFICIAL
+        if host in CMP_HOSTS:
+            return HostFamily.CMP
+        return HostFamily.PUBLIC
+
+    def for_url(self, url: str) -> httpx.AsyncClient:
+        return self._clients[self.family(url)]
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        await self.token_manager.aclose()
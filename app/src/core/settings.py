@@ -2,7 +2,7 @@ import logging
 from logging.config import dictConfig
 from pathlib import Path
 
-from pydantic import AnyHttpUrl, BaseSettings, Field
+from pydantic import AnyHttpUrl, BaseSettings, Field, PositiveInt, SecretStr
 
 from core.logger import LogConfig
 
@@ -39,6 +39,123 @@ class WBAdapter(BaseSettings):
     PROXY_URL: AnyHttpUrl | None = None
     LOG_FORMAT: str = "json"
     LOG_LEVEL: str = "INFO"
+    # Debug-логирование запросов к wildberries: каждый N-й запрос, тело обрезается до HTTP_LOG_BODY_LIMIT байт.
+    HTTP_LOG_SAMPLE_RATE: PositiveInt = 1
+    HTTP_LOG_BODY_LIMIT: int = 2000
+    # Официальное API ходит через PROXY_URL наравне с cmp и публичными хостами.
+    OFFICIAL_API_VIA_PROXY: bool = True
+    # Пулы соединений httpx, по одному на группу хостов wildberries.
+    HTTP_TIMEOUT: float = 5.0
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_TRANSPORT_RETRIES: int = 3
+    # Ограничение частоты запросов к wildberries, запросов в секунду: общее на хост и на поставщика.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_HOST_RPS: dict[str, float] = {"cmp.wildberries.ru": 10.0, "advert-api.wb.ru": 10.0}
+    RATE_LIMIT_DEFAULT_HOST_RPS: float = 20.0
+    RATE_LIMIT_SUPPLIER_RPS: float = 2.0
+    # Размер пачки запросов, которую можно отправить без ожидания, в секундах работы на текущей скорости.
+    RATE_LIMIT_BURST_SECONDS: float = 1.0
+    # Подстройка скорости: при 429 скорость умножается на DECREASE_FACTOR (не ниже MIN_RPS),
+    # после успешного ответа увеличивается на INCREASE_STEP (не выше исходной).
+    RATE_LIMIT_MIN_RPS: float = 0.2
+    RATE_LIMIT_DECREASE_FACTOR: float = 0.5
+    RATE_LIMIT_INCREASE_STEP: float = 0.1
+    # Общий для всех воркеров лимит запросов поставщика в redis по группе хостов (official, cmp, public).
+    RATE_LIMIT_DISTRIBUTED: bool = True
+    RATE_LIMIT_GROUP_RPS: dict[str, float] = {"official": 4.0, "cmp": 2.0, "public": 10.0}
+    # Пауза для всех воркеров после 429 без Retry-After, в секундах.
+    RATE_LIMIT_THROTTLE_DELAY: float = 1.0
+    # Локальные корзины поставщиков, не использовавшиеся дольше RATE_LIMIT_BUCKET_IDLE_TTL секунд, удаляются.
+    RATE_LIMIT_BUCKET_IDLE_TTL: float = 600.0
+    # Повторы запросов к wildberries: пауза full jitter от 0 до min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2^n) секунд.
+    RETRY_BASE_DELAY: float = 0.5
+    RETRY_MAX_DELAY: float = 8.0
+    # Бюджет повторов процесса: RETRY_BUDGET_RATIO повтора на запрос плюс RETRY_BUDGET_MIN_PER_SECOND в секунду,
+    # накапливается не более RETRY_BUDGET_MAX.
+    RETRY_BUDGET_RATIO: float = 0.2
+    RETRY_BUDGET_MIN_PER_SECOND: float = 1.0
+    RETRY_BUDGET_MAX: float = 20.0
+    # Автомат защиты хостов wildberries: если за CIRCUIT_FAILURE_WINDOW секунд было не меньше CIRCUIT_MIN_REQUESTS
+    # запросов и доля ошибок среди них не меньше CIRCUIT_FAILURE_RATIO, запросы к хосту отклоняются
+    # на CIRCUIT_OPEN_SECONDS, затем пропускается пробный запрос.
+    CIRCUIT_BREAKER_ENABLED: bool = True
+    CIRCUIT_MIN_REQUESTS: int = 20
+    CIRCUIT_FAILURE_RATIO: float = 0.5
+    CIRCUIT_FAILURE_WINDOW: float = 10.0
+    CIRCUIT_OPEN_SECONDS: float = 15.0
+    CIRCUIT_PROBE_TIMEOUT: float = 10.0
+    # Как часто процесс сверяет состояние автомата с redis, в секундах.
+    CIRCUIT_SYNC_INTERVAL: float = 1.0
+    # Кеш ответов публичных методов wildberries (память процесса + redis): время актуальности по методам
+    # адаптера, в секундах; после него запись еще CACHE_STALE_TTL секунд (по тем же методам, по умолчанию 0)
+    # отдается, пока обновляется в фоне. Текущие ставки аукциона устаревшими не отдаются.
+    CACHE_ENABLED: bool = True
+    CACHE_TTL: dict[str, float] = {
+        "actual_stakes": 5.0,
+        "products_by_region": 30.0,
+        "organic_by_region": 30.0,
+        "config_values": 600.0,
+    }
+    CACHE_STALE_TTL: dict[str, float] = {
+        "actual_stakes": 0.0,
+        "products_by_region": 30.0,
+        "organic_by_region": 30.0,
+        "config_values": 600.0,
+    }
+    CACHE_LOCAL_MAX_ENTRIES: int = 10000
+    # Количество nm в одном запросе card.wb.ru/cards/detail.
+    CARDS_DETAIL_CHUNK_SIZE: int = 100
+    # Кеш авторизационных данных пользователей из token manager в памяти процесса.
+    AUTH_CACHE_ENABLED: bool = True
+    AUTH_CACHE_TTL: float = 300.0
+    AUTH_CACHE_MAX_SIZE: int = 10000
+    # Общий для всех воркеров уровень кеша в redis, значения шифруются ключом Fernet
+    # (Fernet.generate_key()); без ключа или без пакета cryptography не используется.
+    AUTH_CACHE_ENCRYPTION_KEY: SecretStr | None = None
+    AUTH_CACHE_SHARED_TTL: float = 60.0
+    # Обновление wb_token_access: опрос token manager каждые TOKEN_REFRESH_POLL_INTERVAL секунд,
+    # пока токен не изменится, но не дольше TOKEN_REFRESH_TIMEOUT; блокировка обновления в redis.
+    TOKEN_REFRESH_TIMEOUT: float = 15.0
+    TOKEN_REFRESH_POLL_INTERVAL: float = 0.5
+    TOKEN_REFRESH_LOCK_TTL: float = 30.0
+    # Пул соединений с token manager; HTTP/2 требует установленного пакета h2.
+    TOKEN_MANAGER_MAX_CONNECTIONS: int = 20
+    TOKEN_MANAGER_HTTP2: bool = False
+    # Количество одновременных запросов к token manager при получении данных нескольких пользователей.
+    TOKEN_MANAGER_BULK_CONCURRENCY: int = 10
+    # Фоновое обновление wb_token_access: срок жизни токена и запас до его истечения, в секундах;
+    # задача запускается каждые TOKEN_REFRESH_CRON_MINUTES минут и обновляет до TOKEN_REFRESH_BATCH токенов.
+    TOKEN_ACCESS_LIFETIME: float = 12 * 60 * 60
+    TOKEN_REFRESH_AHEAD: float = 60 * 60
+    TOKEN_REFRESH_CRON_MINUTES: int = 5
+    TOKEN_REFRESH_BATCH: int = 50
+    # Количество авторизационных сессий пользователей, хранимых в памяти процесса.
+    SESSION_CACHE_SIZE: int = 4096
+    # Создание кампании: выполненные шаги и задача, закрепленная за source_id, хранятся в redis
+    # CAMPAIGN_CHECKPOINT_TTL секунд; при временной ошибке задача повторяется
+    # через CAMPAIGN_CREATE_RETRY_DELAY секунд, всего не более CAMPAIGN_CREATE_MAX_TRIES попыток.
+    CAMPAIGN_CHECKPOINT_TTL: float = 24 * 60 * 60
+    CAMPAIGN_CREATE_MAX_TRIES: int = 3
+    CAMPAIGN_CREATE_RETRY_DELAY: float = 10.0
+    # Пакетное создание кампаний: не более CAMPAIGN_BATCH_MAX_SIZE кампаний в запросе,
+    # не более CAMPAIGN_BATCH_CONCURRENCY кампаний поставщика создаются одновременно в каждом процессе воркера
+    # (всего - число воркеров * CAMPAIGN_BATCH_CONCURRENCY).
+    CAMPAIGN_BATCH_MAX_SIZE: int = 100
+    CAMPAIGN_BATCH_CONCURRENCY: int = 2
+    # Пакетное изменение ставок: не более STAKE_BULK_MAX_SIZE кампаний в запросе,
+    # не более STAKE_BULK_CONCURRENCY одновременных запросов к wildberries.
+    STAKE_BULK_MAX_SIZE: int = 500
+    STAKE_BULK_CONCURRENCY: int = 10
+    # Время хранения параметров кампаний (тип, subjectId/setId/menuId) в индексе redis, в секундах.
+    CAMPAIGN_INDEX_TTL: float = 30 * 24 * 60 * 60
+    # Получение информации о нескольких кампаниях: не более CAMPAIGNS_INFO_MAX_SIZE кампаний в запросе,
+    # не более CAMPAIGNS_INFO_CONCURRENCY одновременных запросов к wildberries.
+    CAMPAIGNS_INFO_MAX_SIZE: int = 500
+    CAMPAIGNS_INFO_CONCURRENCY: int = 10
+    # Размер страницы при постраничном получении списка рекламных кампаний.
+    CAMPAIGNS_PAGE_SIZE: int = 1000
 
     class Config:
         env_prefix = "WBADAPTER_"
@@ -7,6 +7,9 @@ wb_campaign_id: ContextVar[str | None] = ContextVar("wb_campaign_id", default=""
 subject_id: ContextVar[str | None] = ContextVar("subject_id", default="")
 user_id: ContextVar[str | None] = ContextVar("user_id", default="")
 
+# adapters.wb.cache: источник ответа последнего запроса через кеш, возвращается в заголовке X-Cache.
+cache_status: ContextVar[str | None] = ContextVar("cache_status", default=None)
+
 
 class AppContext:
     @staticmethod
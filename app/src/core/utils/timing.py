@@ -0,0 +1,107 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from schemas.common import BaseOrjsonModel
+
+
+class StepTiming(BaseOrjsonModel):
+    """Время выполнения шага задачи, в секундах.
+
+    Attributes:
+        calls - количество выполнений шага,
+        duration - суммарное время выполнения, включая ожидания,
+        retries - количество повторов запросов к wildberries,
+        retry_sleep - время ожидания перед повторами,
+        rate_limit_wait - время ожидания в ограничителе частоты запросов.
+    """
+
+    calls: int = 0
+    duration: float = 0.0
+    retries: int = 0
+    retry_sleep: float = 0.0
+    rate_limit_wait: float = 0.0
+
+
+class JobTimingsSummary(BaseOrjsonModel):
+    """Время выполнения задачи: total - общее, включая предыдущие попытки и ожидание между ними."""
+
+    total: float = 0.0
+    steps: dict[str, StepTiming] = {}
+
+
+class JobTimings:
+    """Время выполнения шагов задачи arq.
+
+    Ожидания в adapters.wb.wbadapter учитываются в шаге, который выполняется в этот момент.
+
+    Arguments:
+        previous -- время предыдущих попыток задачи, к которому добавляется время текущей.
+    """
+
+    def __init__(self, previous: JobTimingsSummary | None = None) -> None:
+        self.steps: dict[str, StepTiming] = (
+            {name: timing.copy() for name, timing in previous.steps.items()} if previous else {}
+        )
+        self.previous_total = previous.total if previous else 0.0
+        self.started = time.perf_counter()
+        self._current: StepTiming | None = None
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[StepTiming]:
+        timing = self.steps.setdefault(name, StepTiming())
+        previous, self._current = self._current, timing
+        started = time.perf_counter()
+        try:
+            yield timing
+        finally:
+            timing.calls += 1
+            timing.duration += time.perf_counter() - started
+            self._current = previous
+
+    def retry(self, delay: float) -> None:
+        if self._current is not None:
+            self._current.retries += 1
+            self._current.retry_sleep += delay
+
+    def wait(self, seconds: float) -> None:
+        if self._current is not None and seconds:
+            self._current.rate_limit_wait += seconds
+
+    def defer(self, seconds: float) -> None:
+        """Учитывает ожидание между попытками задачи (Retry(defer=...)) как шаг defer."""
+        timing = self.steps.setdefault("defer", StepTiming())
+        timing.calls += 1
+        timing.duration += seconds
+        self.previous_total += seconds
+
+    def summary(self) -> JobTimingsSummary:
+        return JobTimingsSummary(
+            total=round(self.previous_total + time.perf_counter() - self.started, 4),
+            steps={
+                name: timing.copy(
+                    update={
+                        "duration": round(timing.duration, 4),
+                        "retry_sleep": round(timing.retry_sleep, 4),
+                        "rate_limit_wait": round(timing.rate_limit_wait, 4),
+                    }
+                )
+                for name, timing in self.steps.items()
+            },
+        )
+
+
+# Время шагов текущей задачи; None вне задач, в которых оно измеряется.
+job_timings: ContextVar[JobTimings | None] = ContextVar("job_timings", default=None)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Измеряет время шага name текущей задачи, если оно измеряется."""
+    timings = job_timings.get()
+    if timings is None:
+        yield
+        return
+    with timings.step(name):
+        yield
@@ -0,0 +1,3 @@
+from core.http import HttpClients
+
+clients: HttpClients | None = None
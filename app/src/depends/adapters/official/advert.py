@@ -1,9 +1,8 @@
-import httpx
-
 from adapters.wb.official.advert import AdvertAdapter
-from depends.httpx_client import get_http_client
+from core.http import HttpClients
+from depends.httpx_client import get_http_clients
 
 
 async def get_advert_adapter() -> AdvertAdapter:
-    client: httpx.AsyncClient = await get_http_client()
-    return AdvertAdapter(http_client=client)
+    http_clients: HttpClients = await get_http_clients()
+    return AdvertAdapter(http_clients=http_clients)
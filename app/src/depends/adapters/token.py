@@ -1,5 +1,8 @@
 from adapters.token import TokenManager
+from core.http import HttpClients
+from depends.httpx_client import get_http_clients
 
 
 async def get_token_manager() -> TokenManager:
-    return TokenManager()
+    http_clients: HttpClients = await get_http_clients()
+    return TokenManager(http_client=http_clients.token_manager)
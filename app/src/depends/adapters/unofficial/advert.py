@@ -1,9 +1,8 @@
-import httpx
-
 from adapters.wb.unofficial.advert import AdvertAdapterUnofficial
-from depends.httpx_client import get_http_client
+from core.http import HttpClients
+from depends.httpx_client import get_http_clients
 
 
 async def get_stake_adapter_unofficial() -> AdvertAdapterUnofficial:
-    client: httpx.AsyncClient = await get_http_client()
-    return AdvertAdapterUnofficial(http_client=client)
+    http_clients: HttpClients = await get_http_clients()
+    return AdvertAdapterUnofficial(http_clients=http_clients)
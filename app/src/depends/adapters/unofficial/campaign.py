@@ -1,11 +1,10 @@
-import httpx
-
 from adapters.wb.unofficial.campaign import CampaignAdapterUnofficial
-from depends.httpx_client import get_http_client
+from core.http import HttpClients
+from depends.httpx_client import get_http_clients
 
 
 async def get_campaign_adapter_unofficial() -> CampaignAdapterUnofficial:
-    client: httpx.AsyncClient = await get_http_client()
+    http_clients: HttpClients = await get_http_clients()
     return CampaignAdapterUnofficial(
-        http_client=client,
+        http_clients=http_clients,
     )
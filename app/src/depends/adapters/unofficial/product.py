@@ -1,9 +1,8 @@
-import httpx
-
 from adapters.wb.unofficial.product import ProductAdapter
-from depends.httpx_client import get_http_client
+from core.http import HttpClients
+from depends.httpx_client import get_http_clients
 
 
 async def get_product_adapter_un() -> ProductAdapter:
-    client: httpx.AsyncClient = await get_http_client()
-    return ProductAdapter(http_client=client)
+    http_clients: HttpClients = await get_http_clients()
+    return ProductAdapter(http_clients=http_clients)
@@ -1,11 +1,11 @@
-import httpx
 from fastapi import Depends
 
 from adapters.wb.unofficial.supplier import SupplierAdapter
-from depends.httpx_client import get_http_client
+from core.http import HttpClients
+from depends.httpx_client import get_http_clients
 
 
 async def get_supplier_adapter_un(
-    client: httpx.AsyncClient = Depends(get_http_client),
+    http_clients: HttpClients = Depends(get_http_clients),
 ) -> SupplierAdapter:
-    return SupplierAdapter(http_client=client)
+    return SupplierAdapter(http_clients=http_clients)
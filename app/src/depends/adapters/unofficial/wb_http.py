@@ -1,9 +1,8 @@
-import httpx
-
 from adapters.wb.unofficial.wbadapter import WBAdapterUnofficial
-from depends.httpx_client import get_http_client
+from core.http import HttpClients
+from depends.httpx_client import get_http_clients
 
 
 async def get_wb_http_adapter_un() -> WBAdapterUnofficial:
-    client: httpx.AsyncClient = await get_http_client()
-    return WBAdapterUnofficial(http_client=client)
+    http_clients: HttpClients = await get_http_clients()
+    return WBAdapterUnofficial(http_clients=http_clients)
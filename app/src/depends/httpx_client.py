@@ -1,15 +1,11 @@
-import httpx
+from core.http import HttpClients
+from core.settings import logger
+from db import http
 
-from core.settings import settings
 
-
-async def get_http_client() -> httpx.AsyncClient:
-    proxies: dict[str, str] | None = None
-
-    if settings.WBADAPTER.PROXY_URL:
-        proxies = {
-            "http://": settings.WBADAPTER.PROXY_URL,
-            "https://": settings.WBADAPTER.PROXY_URL,
-        }
-    transport = httpx.AsyncHTTPTransport(retries=3)
-    return httpx.AsyncClient(proxies=proxies, transport=transport)  # type: ignore [arg-type]
+async def get_http_clients() -> HttpClients:
+    clients: HttpClients | None = http.clients
+    if not clients:
+        logger.error("http.clients is None.")
+        raise ValueError("http.clients is None.")
+    return clients
@@ -1,8 +1,16 @@
+from adapters.auth_cache import auth_cache
 from core.settings import logger
+from db import http
 from db.redis import get_redis
 
 
 async def shutdown() -> None:
+    await auth_cache.stop()
+
+    if http.clients is not None:
+        await http.clients.aclose()
+        http.clients = None
+
     try:
         get_redis().close()
     except NameError:
@@ -2,13 +2,17 @@ import aio_pika
 from aio_pika.abc import AbstractRobustConnection
 from redis.asyncio import Redis
 
+from adapters.auth_cache import auth_cache
+from core.http import HttpClients
 from core.settings import settings
-from db import queue, redis
+from db import http, queue, redis
 from services.queue import BaseRabbitQueue
 
 
 async def startup() -> None:
+    http.clients = HttpClients()
     redis.client = Redis.from_url(settings.REDIS.build_url())
+    await auth_cache.start(redis.client)
 
     connection: AbstractRobustConnection = await aio_pika.connect_robust(
         host=settings.RABBITMQ.HOST,
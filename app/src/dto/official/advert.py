@@ -98,6 +98,14 @@ class IntervalDTO(BaseOrjsonModel):
     end: int
 
 
+class RateChangeDTO(BaseOrjsonModel):
+    wb_campaign_id: int
+    rate: int
+    type: CampaignType = CampaignType.SEARCH
+    # subjectId или setId в зависимости от типа кампании; если не задан, определяется по кампании.
+    param: int | None = None
+
+
 class IntervalsDTO(BaseOrjsonModel):
     intervals: list[IntervalDTO]
 
@@ -1,6 +1,7 @@
 from enum import Enum, IntEnum
 from uuid import UUID
 
+from core.utils.timing import JobTimingsSummary
 from dto.official.advert import CampaignType
 from schemas.common import BaseOrjsonModel
 
@@ -14,6 +15,20 @@ class CampaignCreateDTO(BaseOrjsonModel):
     type: CampaignType
 
 
+class CampaignCreateJobDTO(BaseOrjsonModel):
+    """Кампания пакетного создания и job_id, под которым публикуется ее результат."""
+
+    job_id: UUID
+    campaign: CampaignCreateDTO
+
+
+class SubjectDTO(BaseOrjsonModel):
+    """Предмет товара: subject id и название категории."""
+
+    id: int
+    name: str
+
+
 class Place(BaseOrjsonModel):
     keyWord: str
     subjectId: int
@@ -68,3 +83,29 @@ class BalanceDTO(BaseOrjsonModel):
     balance: int
     account: int
     bonus: int | None
+
+
+class CampaignCreateStep(str, Enum):
+    """Шаги создания рекламной кампании в порядке выполнения."""
+
+    CREATE = "create"
+    REPLENISH = "replenish"
+    KEYWORDS = "keywords"
+    FIXED_LIST = "fixed_list"
+    START = "start"
+
+
+class CampaignCreateTimings(BaseOrjsonModel):
+    """Время попыток задачи job_id до повтора; deferred_at - время (unix) откладывания задачи."""
+
+    job_id: UUID
+    summary: JobTimingsSummary
+    deferred_at: float
+
+
+class CampaignCreateCheckpoint(BaseOrjsonModel):
+    """Состояние создания кампании: выполненные шаги, id созданной кампании и время предыдущих попыток задачи."""
+
+    wb_campaign_id: int | None = None
+    done: list[CampaignCreateStep] = []
+    timings: CampaignCreateTimings | None = None
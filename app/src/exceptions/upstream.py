@@ -0,0 +1,5 @@
+from exceptions.base import WBAError
+
+
+class WBUnavailableError(WBAError):
+    pass
@@ -4,6 +4,8 @@ from typing import Annotated
 from fastapi import Depends, Header
 from fastapi.security import HTTPBearer
 
+from core.utils.context import cache_status
+
 http_bearer = HTTPBearer(description="Добавлено для изменения поведения swagger ui.", auto_error=False)
 
 
@@ -12,3 +14,9 @@ def x_user_id(
     token: Annotated[str, Depends(http_bearer)],
 ) -> uuid.UUID:
     return x_user_id
+
+
+def cache_headers() -> dict[str, str]:
+    """Заголовок X-Cache с источником данных ответа (см. adapters.wb.cache.CacheStatus)."""
+    status = cache_status.get()
+    return {"X-Cache": status} if status else {}
@@ -9,7 +9,7 @@ from pydantic import parse_obj_as
 from core.settings import logger
 from dto.official.advert import CampaignType
 from exceptions.base import WBAError
-from routers.utils import x_user_id
+from routers.utils import cache_headers, x_user_id
 from schemas.v1.advert import (
     ActualStakes,
     Config,
@@ -20,9 +20,19 @@ from schemas.v1.advert import (
     Organics,
     ProductResponse,
     Products,
+    RateChangeResult,
+    RatesRequest,
+    RatesResponse,
     StakeResponse,
 )
-from schemas.v1.base import BaseResponse, BaseResponseEmpty, BaseResponseError, BaseResponseSuccess
+from schemas.v1.base import (
+    BaseResponse,
+    BaseResponseEmpty,
+    BaseResponseError,
+    BaseResponseSuccess,
+    ResponseCode,
+    ResponseStatus,
+)
 from services.advert import AdvertService, get_advert_service
 
 router = APIRouter(prefix="/stake", tags=["stake"])
@@ -54,9 +64,9 @@ async def actual_stakes(
         return ORJSONResponse(content=BaseResponseError(description="Ошибка при получении актуальных ставок.").dict())
 
     if stakes.adverts is None:
-        return ORJSONResponse(content=BaseResponseEmpty().dict())
+        return ORJSONResponse(content=BaseResponseEmpty().dict(), headers=cache_headers())
 
-    return ORJSONResponse(content=StakeResponse(payload=stakes).dict(by_alias=True))
+    return ORJSONResponse(content=StakeResponse(payload=stakes).dict(by_alias=True), headers=cache_headers())
 
 
 @router.get(
@@ -87,9 +97,9 @@ async def products_by_region(
         )
 
     if not products.products:
-        return ORJSONResponse(content=BaseResponseEmpty().dict())
+        return ORJSONResponse(content=BaseResponseEmpty().dict(), headers=cache_headers())
 
-    return ORJSONResponse(content=ProductResponse(payload=products).dict())
+    return ORJSONResponse(content=ProductResponse(payload=products).dict(), headers=cache_headers())
 
 
 @router.get(
@@ -118,7 +128,7 @@ async def organic_by_region(
         )
 
         if not organic.products:
-            return ORJSONResponse(content=BaseResponseEmpty().dict())
+            return ORJSONResponse(content=BaseResponseEmpty().dict(), headers=cache_headers())
 
         products = parse_obj_as(list[Organic], organic.products)
         organics = Organics(products=products)
@@ -128,7 +138,7 @@ async def organic_by_region(
         logger.error(e)
         return ORJSONResponse(content=BaseResponseError().dict())
 
-    return ORJSONResponse(content=OrganicResponse(payload=organics).dict())
+    return ORJSONResponse(content=OrganicResponse(payload=organics).dict(), headers=cache_headers())
 
 
 @router.put(
@@ -174,6 +184,58 @@ async def set_new_rate(
     )
 
 
+@router.put(
+    path="/rates",
+    responses={
+        status.HTTP_200_OK: {"model": RatesResponse},
+    },
+    summary="Метод для установки новых значений ставок нескольких кампаний.",
+    description="""Метод позволяет установить новые значения ставок на торгах для нескольких кампаний пользователя.
+Результат возвращается для каждой кампании в порядке запроса.
+[https://advert-api.wb.ru/adv/v0/cpm]\
+(https://advert-api.wb.ru/adv/v0/cpm)
+""",
+)
+async def set_new_rates(
+    body: RatesRequest,
+    user_id: Annotated[uuid.UUID, Depends(x_user_id)],
+    advert_service: AdvertService = Depends(get_advert_service),
+) -> Response:
+    try:
+        errors = await advert_service.set_new_rates(user_id=user_id, changes=body.rates)
+    except WBAError as e:
+        return ORJSONResponse(content=BaseResponse.parse_obj(e.__dict__).dict())
+    except Exception as e:
+        logger.error(e)
+        return ORJSONResponse(
+            content=BaseResponseError(description="Ошибка при установке новых значений ставок на торгах.").dict()
+        )
+
+    results: list[RateChangeResult] = []
+    for change, error in zip(body.rates, errors):
+        if error is None:
+            result = RateChangeResult(
+                wb_campaign_id=change.wb_campaign_id, status=ResponseStatus.OK, status_code=ResponseCode.OK
+            )
+        elif isinstance(error, WBAError):
+            result = RateChangeResult(
+                wb_campaign_id=change.wb_campaign_id,
+                status=ResponseStatus.ERROR,
+                status_code=error.status_code,
+                description=error.description,
+            )
+        else:
+            logger.error(error)
+            result = RateChangeResult(
+                wb_campaign_id=change.wb_campaign_id,
+                status=ResponseStatus.ERROR,
+                status_code=ResponseCode.ERROR,
+                description="Ошибка при установке нового значения ставки на торгах.",
+            )
+        results.append(result)
+    return ORJSONResponse(content=RatesResponse(payload=results).dict())
+
+
 @router.put(
     path="/pause",
     responses={
@@ -298,7 +360,7 @@ async def config(
 ) -> Response:
     try:
         config = await advert_service.config_values()
-        return ORJSONResponse(content=ConfigResponse(payload=Config.parse_obj(config)).dict())
+        return ORJSONResponse(content=ConfigResponse(payload=Config.parse_obj(config)).dict(), headers=cache_headers())
     except WBAError as e:
         return ORJSONResponse(content=BaseResponse.parse_obj(e.__dict__).dict())
     except Exception as e:
@@ -1,27 +1,56 @@
+import asyncio
 import uuid
-from typing import Annotated
+from typing import Annotated, AsyncIterator
 
+import orjson
 from arq import ArqRedis
-from fastapi import APIRouter, Depends, Header, Query, status
-from fastapi.responses import ORJSONResponse, Response
+from fastapi import APIRouter, Body, Depends, Header, Query, status
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from redis.asyncio import Redis
 
-from core.settings import logger
+from core.settings import logger, settings
 from depends.arq import get_arq
-from dto.official.advert import CampaignInfoDTO, CampaignsDTO, CampaignStatus, CampaignType
-from dto.unofficial.campaign import CampaignCreateDTO, ReplenishBugetRequestDTO, ReplenishSourceType
+from depends.db.redis import get_redis
+from dto.official.advert import CampaignDTO, CampaignInfoDTO, CampaignsDTO, CampaignStatus, CampaignType
+from dto.unofficial.campaign import (
+    CampaignCreateDTO,
+    CampaignCreateJobDTO,
+    ReplenishBugetRequestDTO,
+    ReplenishSourceType,
+)
 from exceptions.base import WBAError
 from routers.utils import x_user_id
 from schemas.v1.advert import (
+    Campaign,
     CampaignBudget,
     CampaignBudgetResponse,
     CampaignInfo,
+    CampaignInfoResult,
     CampaignResponse,
     Campaigns,
+    CampaignsInfoRequest,
+    CampaignsInfoResponse,
     CampaignsResponse,
 )
-from schemas.v1.base import BaseResponse, BaseResponseEmpty, BaseResponseError, JobResult, RequestQueuedResponse
-from schemas.v1.campaign import Budget, CreateCampaignResponse, ReplenishBugetResponse
+from schemas.v1.base import (
+    BaseResponse,
+    BaseResponseEmpty,
+    BaseResponseError,
+    JobResult,
+    RequestQueuedResponse,
+    ResponseCode,
+    ResponseStatus,
+)
+from schemas.v1.campaign import (
+    Budget,
+    CampaignQueued,
+    CampaignsBatchQueuedResponse,
+    CreateCampaignResponse,
+    ReplenishBugetResponse,
+)
 from services.campaign import CampaignService, get_campaign_service
+from services.campaign_creation import CampaignSources
+from tasks.create_campaign_batch import CampaignCreateBatchTask
 from tasks.create_full_campaign import CampaignCreateFullTask
 from tasks.restart_create_campaign import СontinueCreateCampaignTask
 
@@ -42,19 +71,78 @@ async def create_full_campaign(
     user_id: Annotated[uuid.UUID, Depends(x_user_id)],
     routing_key: Annotated[str, Header()],
     arq: ArqRedis = Depends(get_arq),
+    redis: Redis = Depends(get_redis),
 ) -> RequestQueuedResponse:
     job_id = uuid.uuid4()
+    # Повторный запрос с тем же source_id возвращает уже созданную задачу.
+    sources = CampaignSources(redis)
+    if existing := await sources.claim(campaign.source_id, job_id):
+        return RequestQueuedResponse(job_id=existing)
 
-    await arq.enqueue_job(
-        CampaignCreateFullTask.create_full_campaign.__qualname__,
-        job_id,
-        campaign,
-        routing_key,
-        user_id,
-    )
+    try:
+        await arq.enqueue_job(
+            CampaignCreateFullTask.create_full_campaign.__qualname__,
+            job_id,
+            campaign,
+            routing_key,
+            user_id,
+        )
+    except Exception:
+        # Задача не поставлена: повторный запрос должен создать новую, а не вернуть job_id этой.
+        await sources.release(campaign.source_id, job_id)
+        raise
     return RequestQueuedResponse(job_id=job_id)
 
 
+@router.post(
+    path="/full/batch",
+    responses={
+        status.HTTP_202_ACCEPTED: {"model": CampaignsBatchQueuedResponse},
+        status.HTTP_201_CREATED: {"model": JobResult[CreateCampaignResponse]},
+    },
+    summary="Возвращает 200 в случае успешного создания задачи.",
+    description="""
+Создает и запускает несколько рекламных кампаний пользователя одной задачей.
+Результат каждой кампании публикуется отдельно под ее job_id по мере готовности.
+""",
+)
+async def create_full_campaign_batch(
+    campaigns: Annotated[
+        list[CampaignCreateDTO], Body(min_items=1, max_items=settings.WBADAPTER.CAMPAIGN_BATCH_MAX_SIZE)
+    ],
+    user_id: Annotated[uuid.UUID, Depends(x_user_id)],
+    routing_key: Annotated[str, Header()],
+    arq: ArqRedis = Depends(get_arq),
+    redis: Redis = Depends(get_redis),
+) -> CampaignsBatchQueuedResponse:
+    job_id = uuid.uuid4()
+    sources = CampaignSources(redis)
+    jobs: list[CampaignCreateJobDTO] = []
+    queued: list[CampaignQueued] = []
+    for campaign in campaigns:
+        campaign_job_id = uuid.uuid4()
+        # Кампании, создание которых уже запущено, в пакет не попадают.
+        if existing := await sources.claim(campaign.source_id, campaign_job_id):
+            queued.append(CampaignQueued(source_id=campaign.source_id, job_id=existing))
+            continue
+        jobs.append(CampaignCreateJobDTO(job_id=campaign_job_id, campaign=campaign))
+        queued.append(CampaignQueued(source_id=campaign.source_id, job_id=campaign_job_id))
+
+    if jobs:
+        try:
+            await arq.enqueue_job(
+                CampaignCreateBatchTask.create_campaign_batch.__qualname__,
+                job_id,
+                jobs,
+                routing_key,
+                user_id,
+            )
+        except Exception:
+            await asyncio.gather(*(sources.release(job.campaign.source_id, job.job_id) for job in jobs))
+            raise
+    return CampaignsBatchQueuedResponse(job_id=job_id, campaigns=queued)
+
+
 @router.put(
     path="/continue",
     responses={
@@ -78,12 +166,131 @@ async def continue_create_campaign(
         job_id=job_id,
         campaign=campaign,
         routing_key=routing_key,
-        user_id=x_user_id,
+        user_id=user_id,
         wb_campaign_id=wb_campaign_id,
     )
     return RequestQueuedResponse(job_id=job_id)
 
 
+@router.get(
+    path="/stream",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {"model": Campaign, "content": {"application/x-ndjson": {}}},
+    },
+    summary="Метод для получения всех рекламных кампаний пользователя потоком.",
+    description="""
+Метод возвращает все рекламные кампании пользователя в формате NDJSON: одна кампания в строке.
+Кампании отдаются по мере получения страниц от wildberries. Если получить очередную страницу не удалось,
+последней строкой возвращается ошибка в формате BaseResponse.
+[https://advert-api.wb.ru/adv/v0/adverts]\
+(https://advert-api.wb.ru/adv/v0/adverts)
+""",
+)
+async def campaigns_stream(
+    user_id: Annotated[uuid.UUID, Depends(x_user_id)],
+    campaign_service: CampaignService = Depends(get_campaign_service),
+    type: CampaignType | None = Query(None, description="Тип рекламной кампании."),
+    status: CampaignStatus | None = Query(None, description="Статус рекламной кампании."),
+) -> Response:
+    try:
+        pages = await campaign_service.campaign_pages(type=type, status=status)
+        # Первая страница запрашивается до начала ответа, чтобы вернуть ошибку обычным ответом.
+        first_page: list[CampaignDTO] | None = await anext(pages, None)
+    except WBAError as e:
+        return ORJSONResponse(content=BaseResponse.parse_obj(e.__dict__).dict())
+    except Exception as e:
+        logger.error(e)
+        return ORJSONResponse(
+            content=BaseResponseError(
+                description=f"Ошибка при получении списка рекламных кампаний. user_id={user_id}"
+            ).dict()
+        )
+    if first_page is None:
+        return ORJSONResponse(content=BaseResponseEmpty().dict())
+
+    async def lines() -> AsyncIterator[bytes]:
+        page: list[CampaignDTO] | None = first_page
+        try:
+            while page is not None:
+                yield b"".join(orjson.dumps(Campaign.parse_obj(campaign).dict()) + b"\n" for campaign in page)
+                page = await anext(pages, None)
+        except WBAError as e:
+            yield orjson.dumps(BaseResponse.parse_obj(e.__dict__).dict()) + b"\n"
+        except Exception as e:
+            logger.error(e)
+            error = BaseResponseError(description=f"Ошибка при получении списка рекламных кампаний. user_id={user_id}")
+            yield orjson.dumps(error.dict()) + b"\n"
+        finally:
+            await pages.aclose()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.post(
+    path="/info",
+    responses={
+        status.HTTP_200_OK: {"model": CampaignsInfoResponse},
+    },
+    summary="Метод для получения информации о нескольких рекламных кампаниях.",
+    description="""
+Метод позволяет получить информацию о нескольких рекламных кампаниях по id одним запросом.
+Результат возвращается для каждой кампании в порядке запроса.
+[https://advert-api.wb.ru/adv/v0/advert]\
+(https://advert-api.wb.ru/adv/v0/advert)
+""",
+)
+async def campaigns_info(
+    body: CampaignsInfoRequest,
+    user_id: Annotated[uuid.UUID, Depends(x_user_id)],
+    campaign_service: CampaignService = Depends(get_campaign_service),
+) -> Response:
+    try:
+        campaigns = await campaign_service.campaigns_info(campaign_ids=body.ids)
+    except WBAError as e:
+        return ORJSONResponse(content=BaseResponse.parse_obj(e.__dict__).dict())
+    except Exception as e:
+        logger.error(e)
+        return ORJSONResponse(
+            content=BaseResponseError(description="Не удалось получить информацию о рекламных кампаниях.").dict()
+        )
+
+    results: list[CampaignInfoResult] = []
+    for wb_campaign_id in body.ids:
+        campaign = campaigns[wb_campaign_id]
+        if isinstance(campaign, CampaignInfoDTO):
+            result = CampaignInfoResult(
+                wb_campaign_id=wb_campaign_id,
+                status=ResponseStatus.OK,
+                status_code=ResponseCode.OK,
+                campaign=CampaignInfo.parse_obj(campaign),
+            )
+        elif campaign is None:
+            result = CampaignInfoResult(
+                wb_campaign_id=wb_campaign_id,
+                status=ResponseStatus.NO_CONTENT,
+                status_code=ResponseCode.NO_CONTENT,
+                description="В ответ на запрос информации о рекламной кампании получен пустой ответ.",
+            )
+        elif isinstance(campaign, WBAError):
+            result = CampaignInfoResult(
+                wb_campaign_id=wb_campaign_id,
+                status=ResponseStatus.ERROR,
+                status_code=campaign.status_code,
+                description=campaign.description,
+            )
+        else:
+            logger.error(campaign)
+            result = CampaignInfoResult(
+                wb_campaign_id=wb_campaign_id,
+                status=ResponseStatus.ERROR,
+                status_code=ResponseCode.ERROR,
+                description="Не удалось получить информацию о рекламной кампании.",
+            )
+        results.append(result)
+    return ORJSONResponse(content=CampaignsInfoResponse(payload=results).dict())
+
+
 @router.get(
     path="/{wb_campaign_id}",
     responses={
@@ -3,9 +3,10 @@ from enum import IntEnum, auto
 
 from pydantic import Field
 
-from dto.official.advert import CampaignInterval, CampaignStatus, CampaignType, IntervalDTO
+from core.settings import settings
+from dto.official.advert import CampaignInterval, CampaignStatus, CampaignType, IntervalDTO, RateChangeDTO
 from schemas.common import BaseOrjsonModel
-from schemas.v1.base import BaseResponseSuccess
+from schemas.v1.base import BaseResponseSuccess, ResponseStatus
 
 
 class ActualStakesAdverts(BaseOrjsonModel):
@@ -119,6 +120,22 @@ class CampaignsResponse(BaseResponseSuccess):
     payload: Campaigns | None
 
 
+class CampaignsInfoRequest(BaseOrjsonModel):
+    ids: list[int] = Field(min_items=1, max_items=settings.WBADAPTER.CAMPAIGNS_INFO_MAX_SIZE)
+
+
+class CampaignInfoResult(BaseOrjsonModel):
+    wb_campaign_id: int
+    status: ResponseStatus
+    status_code: int
+    description: str | None = None
+    campaign: CampaignInfo | None = None
+
+
+class CampaignsInfoResponse(BaseResponseSuccess):
+    payload: list[CampaignInfoResult]
+
+
 class CampaignBudget(BaseOrjsonModel):
     budget: int
 
@@ -136,6 +153,21 @@ class IntervalsRequest(BaseOrjsonModel):
     param: int | None = None
 
 
+class RatesRequest(BaseOrjsonModel):
+    rates: list[RateChangeDTO] = Field(min_items=1, max_items=settings.WBADAPTER.STAKE_BULK_MAX_SIZE)
+
+
+class RateChangeResult(BaseOrjsonModel):
+    wb_campaign_id: int
+    status: ResponseStatus
+    status_code: int
+    description: str | None = None
+
+
+class RatesResponse(BaseResponseSuccess):
+    payload: list[RateChangeResult]
+
+
 class Config(BaseOrjsonModel):
     budget_min: int
     cpm_min: int
@@ -5,6 +5,7 @@ from typing import Generic, TypeVar
 from fastapi import Response
 from pydantic.generics import GenericModel
 
+from core.utils.timing import JobTimingsSummary
 from schemas.common import BaseOrjsonModel
 
 T = TypeVar("T")
@@ -19,6 +20,9 @@ class JobResult(GenericModel, Generic[T]):
     response: T
     status_code: int = 200
     text: str | None = None
+    # Номер попытки задачи arq и время выполнения ее шагов (для задач, в которых оно измеряется).
+    job_try: int | None = None
+    timings: JobTimingsSummary | None = None
 
     class Config:
         extra = "allow"
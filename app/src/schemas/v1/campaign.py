@@ -11,6 +11,16 @@ class CreateCampaignResponse(BaseOrjsonModel):
     wb_campaign_id: str | None = None
 
 
+class CampaignQueued(BaseOrjsonModel):
+    source_id: UUID
+    job_id: UUID = Field(description="Идентификатор, под которым будет опубликован результат создания кампании")
+
+
+class CampaignsBatchQueuedResponse(BaseOrjsonModel):
+    job_id: UUID = Field(description="Идентификатор пакетной задачи")
+    campaigns: list[CampaignQueued]
+
+
 class Budget(BaseOrjsonModel):
     budget: int = Field(description="Текущий бюджет рекламной кампании")
 
@@ -1,19 +1,23 @@
+import asyncio
 import uuid
 
 from fastapi import Depends
 
 from adapters.token import TokenManager
+from adapters.wb.campaign_index import CampaignMeta, campaign_index
 from adapters.wb.official.advert import AdvertAdapter
+from adapters.wb.session import WBSession
 from adapters.wb.unofficial.advert import AdvertAdapterUnofficial
 from adapters.wb.unofficial.campaign import CampaignAdapterUnofficial
-from core.settings import logger
+from core.settings import logger, settings
 from core.utils.context import AppContext
 from depends.adapters.official.advert import get_advert_adapter
 from depends.adapters.token import get_token_manager
 from depends.adapters.unofficial.advert import get_stake_adapter_unofficial
 from depends.adapters.unofficial.campaign import get_campaign_adapter_unofficial
-from dto.official.advert import IntervalDTO
+from dto.official.advert import IntervalDTO, RateChangeDTO
 from dto.unofficial.advert import ActualStakesDTO, ConfigDTO, OrganicsDTO, ProductsDTO
+from exceptions.base import WBAError
 
 
 class AdvertService:
@@ -59,20 +63,61 @@ class AdvertService:
         param: int | None = None,
     ) -> None:
         auth_data = await self.token_manager.auth_data_by_user_id_official(user_id)
-        self.stake_adapter.auth_data = auth_data
+        session = self.stake_adapter.session(auth_data, user_id=user_id)
 
         # TODO: убрать после добавления subject_id в доменную модель campaign manager
-        if param:
-            await self.stake_adapter.change_rate(advert_id=wb_campaign_id, cpm=rate, param=param, type=ad_type)
-        elif campaign := await self.stake_adapter.campaign(id=wb_campaign_id):
-            if campaign.params and campaign.params[0].subjectId:
-                subject_id = campaign.params[0].subjectId
-                param = subject_id
+        param = param or await self._campaign_param(session=session, wb_campaign_id=wb_campaign_id)
         if not param:
             logger.error(f"Could not get subject_id. wb_campaign_id={wb_campaign_id}")
             return
 
-        await self.stake_adapter.change_rate(advert_id=wb_campaign_id, cpm=rate, param=param, type=ad_type)
+        await self.stake_adapter.change_rate(
+            session=session, advert_id=wb_campaign_id, cpm=rate, param=param, type=ad_type
+        )
+
+    async def set_new_rates(self, user_id: uuid.UUID, changes: list[RateChangeDTO]) -> list[Exception | None]:
+        """Устанавливает новые ставки нескольких кампаний пользователя.
+
+        Авторизационные данные запрашиваются один раз, ставки меняются параллельно, не более
+        STAKE_BULK_CONCURRENCY запросов одновременно; частоту запросов поставщика ограничивает
+        adapters.wb.ratelimit.
+
+        Returns:
+            Ошибку для каждого изменения в порядке changes, None - ставка установлена.
+        """
+        auth_data = await self.token_manager.auth_data_by_user_id_official(user_id)
+        session = self.stake_adapter.session(auth_data, user_id=user_id)
+        semaphore = asyncio.Semaphore(settings.WBADAPTER.STAKE_BULK_CONCURRENCY)
+
+        async def change_rate(change: RateChangeDTO) -> None:
+            async with semaphore:
+                param = change.param or await self._campaign_param(
+                    session=session, wb_campaign_id=change.wb_campaign_id
+                )
+                if not param:
+                    raise WBAError(description=f"Could not get subject_id. wb_campaign_id={change.wb_campaign_id}")
+                await self.stake_adapter.change_rate(
+                    session=session, advert_id=change.wb_campaign_id, cpm=change.rate, param=param, type=change.type
+                )
+
+        results = await asyncio.gather(*(change_rate(change) for change in changes), return_exceptions=True)
+        errors: list[Exception | None] = []
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                raise result
+            errors.append(result)
+        return errors
+
+    async def _campaign_param(self, session: WBSession, wb_campaign_id: int) -> int | None:
+        """Возвращает param кампании (subjectId, setId или menuId) для изменения ставки и интервалов.
+
+        Сначала используется индекс кампаний в redis, кампания запрашивается у wildberries только при промахе.
+        """
+        if param := await campaign_index.param(wb_campaign_id):
+            return param
+        if campaign := await self.stake_adapter.campaign(session=session, id=wb_campaign_id):
+            return CampaignMeta.from_info(campaign).param
+        return None
 
     async def pause_campaign(
         self,
@@ -80,8 +125,8 @@ class AdvertService:
         user_id: uuid.UUID,
     ) -> None:
         auth_data = await self.token_manager.auth_data_by_user_id_official(user_id)
-        self.stake_adapter.auth_data = auth_data
-        await self.stake_adapter.pause_campaign(id=wb_campaign_id)
+        session = self.stake_adapter.session(auth_data, user_id=user_id)
+        await self.stake_adapter.pause_campaign(session=session, id=wb_campaign_id)
 
     async def resume_campaign(
         self,
@@ -89,8 +134,8 @@ class AdvertService:
         user_id: uuid.UUID,
     ) -> None:
         auth_data = await self.token_manager.auth_data_by_user_id_official(user_id)
-        self.stake_adapter.auth_data = auth_data
-        await self.stake_adapter.start_campaign(id=wb_campaign_id)
+        session = self.stake_adapter.session(auth_data, user_id=user_id)
+        await self.stake_adapter.start_campaign(session=session, id=wb_campaign_id)
 
     async def set_time_intervals(
         self,
@@ -100,25 +145,23 @@ class AdvertService:
         param: int | None,
     ) -> None:
         auth_data = await self.token_manager.auth_data_by_user_id_official(user_id)
-        self.stake_adapter.auth_data = auth_data
+        session = self.stake_adapter.session(auth_data, user_id=user_id)
 
         # TODO: убрать после добавления subject_id в доменную модель campaign manager
-        if param:
-            await self.stake_adapter.set_time_intervals(wb_campaign_id=wb_campaign_id, intervals=intervals, param=param)
-        elif campaign := await self.stake_adapter.campaign(id=wb_campaign_id):
-            if campaign.params and campaign.params[0].subjectId:
-                subject_id = campaign.params[0].subjectId
-                param = subject_id
+        param = param or await self._campaign_param(session=session, wb_campaign_id=wb_campaign_id)
         if not param:
             logger.error(f"Не удалось получить subject_id. wb_campaign_id={wb_campaign_id}")
             return
 
-        await self.stake_adapter.set_time_intervals(wb_campaign_id=wb_campaign_id, intervals=intervals, param=param)
+        await self.stake_adapter.set_time_intervals(
+            session=session, wb_campaign_id=wb_campaign_id, intervals=intervals, param=param
+        )
 
     async def config_values(self) -> ConfigDTO:
-        auth_data = await self.token_manager.auth_data_by_user_id_unofficial(user_id=AppContext.user_id())
-        self.advert_adapter_unofficial.auth_data = auth_data
-        return await self.advert_adapter_unofficial.config_values()
+        user_id = AppContext.user_id()
+        auth_data = await self.token_manager.auth_data_by_user_id_unofficial(user_id=user_id)
+        session = self.advert_adapter_unofficial.session(auth_data, user_id=user_id)
+        return await self.advert_adapter_unofficial.config_values(session=session)
 
 
 async def get_advert_service(
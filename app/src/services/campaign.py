@@ -1,14 +1,17 @@
+import asyncio
+from typing import AsyncGenerator
+
 from fastapi import Depends
 
 from adapters.token import TokenManager
 from adapters.wb.official.advert import AdvertAdapter
 from adapters.wb.unofficial.campaign import CampaignAdapterUnofficial
+from core.settings import settings
 from core.utils.context import AppContext
 from depends.adapters.official.advert import get_advert_adapter
 from depends.adapters.token import get_token_manager
 from depends.adapters.unofficial.campaign import get_campaign_adapter_unofficial
-from dto.official.advert import BudgetDTO, CampaignInfoDTO, CampaignsDTO, CampaignStatus, CampaignType
-from dto.token import OfficialUserAuthDataDTO
+from dto.official.advert import BudgetDTO, CampaignDTO, CampaignInfoDTO, CampaignsDTO, CampaignStatus, CampaignType
 from dto.unofficial.campaign import ReplenishBugetRequestDTO
 
 
@@ -29,11 +32,13 @@ class CampaignService:
         Returns:
             Возвращает новое значение бюджета кампании.
         """
-        auth_data = await self.token_manager.auth_data_by_user_id_unofficial(AppContext.user_id())
-        self.campaign_adapter_unofficial.auth_data = auth_data
-        self.advert_adapter.auth_data = OfficialUserAuthDataDTO(wb_token_ad=auth_data.wb_token_ad)
-        await self.campaign_adapter_unofficial.replenish_budget_at(replenish)
-        amount = await self.campaign_adapter_unofficial.get_campaign_budget(id=replenish.wb_campaign_id)
+        user_id = AppContext.user_id()
+        auth_data = await self.token_manager.auth_data_by_user_id_unofficial(user_id)
+        session = self.campaign_adapter_unofficial.session(auth_data, user_id=user_id)
+        await self.campaign_adapter_unofficial.replenish_budget_at(session=session, replenish=replenish)
+        amount = await self.campaign_adapter_unofficial.get_campaign_budget(
+            session=session, id=replenish.wb_campaign_id
+        )
         return int(amount)
 
     async def campaigns(
@@ -42,19 +47,63 @@ class CampaignService:
         status: CampaignStatus | None,
         limit: int | None = None,
     ) -> CampaignsDTO | None:
-        auth_data = await self.token_manager.auth_data_by_user_id_official(AppContext.user_id())
-        self.advert_adapter.auth_data = auth_data
-        return await self.advert_adapter.campaigns(type=type, status=status, limit=limit)
+        user_id = AppContext.user_id()
+        auth_data = await self.token_manager.auth_data_by_user_id_official(user_id)
+        session = self.advert_adapter.session(auth_data, user_id=user_id)
+        return await self.advert_adapter.campaigns(session=session, type=type, status=status, limit=limit)
+
+    async def campaign_pages(
+        self,
+        type: CampaignType | None,
+        status: CampaignStatus | None,
+    ) -> AsyncGenerator[list[CampaignDTO], None]:
+        """Возвращает итератор по страницам всех кампаний пользователя.
+
+        Авторизационные данные запрашиваются сразу, чтобы ошибка авторизации вернулась до начала ответа.
+        """
+        user_id = AppContext.user_id()
+        auth_data = await self.token_manager.auth_data_by_user_id_official(user_id)
+        session = self.advert_adapter.session(auth_data, user_id=user_id)
+        return self.advert_adapter.iter_campaigns(session=session, type=type, status=status)
 
     async def campaign(self, campaign_id: int) -> CampaignInfoDTO | None:
-        auth_data = await self.token_manager.auth_data_by_user_id_official(AppContext.user_id())
-        self.advert_adapter.auth_data = auth_data
-        return await self.advert_adapter.campaign(id=campaign_id)
+        user_id = AppContext.user_id()
+        auth_data = await self.token_manager.auth_data_by_user_id_official(user_id)
+        session = self.advert_adapter.session(auth_data, user_id=user_id)
+        return await self.advert_adapter.campaign(session=session, id=campaign_id)
+
+    async def campaigns_info(self, campaign_ids: list[int]) -> dict[int, CampaignInfoDTO | None | Exception]:
+        """Возвращает информацию о нескольких рекламных кампаниях.
+
+        Авторизационные данные запрашиваются один раз, кампании запрашиваются параллельно, не более
+        CAMPAIGNS_INFO_CONCURRENCY запросов одновременно; повторяющиеся id запрашиваются один раз.
+
+        Returns:
+            Для каждого id кампанию, None, если она не найдена, или ошибку ее получения.
+        """
+        user_id = AppContext.user_id()
+        auth_data = await self.token_manager.auth_data_by_user_id_official(user_id)
+        session = self.advert_adapter.session(auth_data, user_id=user_id)
+        semaphore = asyncio.Semaphore(settings.WBADAPTER.CAMPAIGNS_INFO_CONCURRENCY)
+
+        async def campaign(campaign_id: int) -> CampaignInfoDTO | None:
+            async with semaphore:
+                return await self.advert_adapter.campaign(session=session, id=campaign_id)
+
+        ids = list(dict.fromkeys(campaign_ids))
+        results = await asyncio.gather(*(campaign(campaign_id) for campaign_id in ids), return_exceptions=True)
+        campaigns: dict[int, CampaignInfoDTO | None | Exception] = {}
+        for campaign_id, result in zip(ids, results):
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                raise result
+            campaigns[campaign_id] = result
+        return campaigns
 
     async def budget(self, wb_campaign_id: int) -> BudgetDTO:
-        auth_data = await self.token_manager.auth_data_by_user_id_official(AppContext.user_id())
-        self.advert_adapter.auth_data = auth_data
-        return await self.advert_adapter.budget(wb_campaign_id=wb_campaign_id)
+        user_id = AppContext.user_id()
+        auth_data = await self.token_manager.auth_data_by_user_id_official(user_id)
+        session = self.advert_adapter.session(auth_data, user_id=user_id)
+        return await self.advert_adapter.budget(session=session, wb_campaign_id=wb_campaign_id)
 
 
 async def get_campaign_service(
@@ -0,0 +1,245 @@
+import uuid
+from http import HTTPStatus
+
+import httpx
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from adapters.token import RELEASE_LOCK_SCRIPT, TokenManager
+from adapters.wb.session import WBSession
+from adapters.wb.unofficial.campaign import CampaignAdapterUnofficial
+from core.settings import logger, settings
+from core.utils.timing import timed
+from dto.token import UnofficialUserAuthDataDTO
+from dto.unofficial.campaign import (
+    CampaignCreateCheckpoint,
+    CampaignCreateDTO,
+    CampaignCreateStep,
+    ReplenishBugetRequestDTO,
+    ReplenishSourceType,
+    SubjectDTO,
+)
+from exceptions.base import WBAErrorNotAuth
+from exceptions.upstream import WBUnavailableError
+
+# Ответы, после которых шаг имеет смысл повторить позже.
+TRANSIENT_CODES = frozenset({HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN, HTTPStatus.TOO_MANY_REQUESTS})
+# Шаги, повтор которых после неизвестного результата может создать вторую кампанию или пополнить бюджет дважды.
+NON_IDEMPOTENT_STEPS = frozenset({CampaignCreateStep.CREATE, CampaignCreateStep.REPLENISH})
+
+
+class CampaignCheckpoints:
+    """Хранит в redis состояние создания кампании по source_id.
+
+    Состояние не удаляется после завершения: повторная задача для того же source_id
+    не выполняет уже пройденные шаги и не создает вторую кампанию.
+    """
+
+    KEY_PREFIX = "wba:campaign:checkpoint"
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+
+    def _key(self, source_id: uuid.UUID) -> str:
+        return f"{self.KEY_PREFIX}:{source_id}"
+
+    async def load(self, source_id: uuid.UUID) -> CampaignCreateCheckpoint | None:
+        try:
+            raw = await self.redis.get(self._key(source_id))
+        except RedisError as e:
+            logger.warning(f"Campaign checkpoint is unavailable: {e}. source_id={source_id}")
+            return None
+        if raw is None:
+            return None
+        return CampaignCreateCheckpoint.parse_raw(raw)
+
+    async def restore(self, source_id: uuid.UUID, initial: CampaignCreateCheckpoint) -> CampaignCreateCheckpoint:
+        """Возвращает сохраненное состояние или initial, если состояния нет
+        или оно относится к другой кампании wildberries."""
+        checkpoint = await self.load(source_id)
+        if checkpoint is None or (initial.wb_campaign_id and checkpoint.wb_campaign_id != initial.wb_campaign_id):
+            return initial.copy(deep=True)
+        return checkpoint
+
+    async def save(self, source_id: uuid.UUID, checkpoint: CampaignCreateCheckpoint) -> bool:
+        """Сохраняет состояние; возвращает False, если redis недоступен."""
+        try:
+            await self.redis.set(
+                self._key(source_id),
+                checkpoint.json(),
+                ex=int(settings.WBADAPTER.CAMPAIGN_CHECKPOINT_TTL),
+            )
+        except RedisError as e:
+            logger.warning(f"Campaign checkpoint is unavailable: {e}. source_id={source_id}")
+            return False
+        return True
+
+
+class CampaignSources:
+    """Ключ идемпотентности создания кампании: source_id -> job_id задачи, которая ее создает."""
+
+    KEY_PREFIX = "wba:campaign:source"
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+
+    def _key(self, source_id: uuid.UUID) -> str:
+        return f"{self.KEY_PREFIX}:{source_id}"
+
+    async def claim(self, source_id: uuid.UUID, job_id: uuid.UUID) -> uuid.UUID | None:
+        """Закрепляет source_id за задачей job_id.
+
+        Returns:
+            job_id задачи, за которой source_id уже закреплен, или None, если закреплен за job_id.
+            Если redis недоступен, возвращается None: повторы не отсекаются, но задача все равно
+            пропустит шаги, сохраненные в CampaignCheckpoints.
+        """
+        key = self._key(source_id)
+        try:
+            claimed = await self.redis.set(
+                key, str(job_id), nx=True, ex=int(settings.WBADAPTER.CAMPAIGN_CHECKPOINT_TTL)
+            )
+            if claimed:
+                return None
+            existing = await self.redis.get(key)
+        except RedisError as e:
+            logger.warning(f"Campaign source registry is unavailable: {e}. source_id={source_id}")
+            return None
+        if existing is None:
+            # Запись истекла между запросами.
+            return await self.claim(source_id, job_id)
+        return uuid.UUID(existing.decode() if isinstance(existing, bytes) else existing)
+
+    async def release(self, source_id: uuid.UUID, job_id: uuid.UUID) -> None:
+        """Освобождает source_id, если он закреплен за job_id, чтобы создание можно было запустить снова."""
+        try:
+            await self.redis.eval(RELEASE_LOCK_SCRIPT, 1, self._key(source_id), str(job_id))
+        except RedisError as e:
+            logger.warning(f"Campaign source registry is unavailable: {e}. source_id={source_id}")
+
+
+class CampaignCreation:
+    """Создание рекламной кампании как последовательность шагов CampaignCreateStep.
+
+    После каждого шага состояние сохраняется в redis, поэтому при повторе задачи
+    выполненные шаги (и их запросы к wildberries) пропускаются.
+
+    Arguments:
+        auth_data -- авторизационные данные пользователя, если они уже получены,
+        subjects -- предметы nm, если они уже известны (см. CampaignAdapterUnofficial.get_subjects).
+    """
+
+    def __init__(
+        self,
+        job_id: uuid.UUID,
+        user_id: uuid.UUID,
+        campaign: CampaignCreateDTO,
+        checkpoint: CampaignCreateCheckpoint,
+        checkpoints: CampaignCheckpoints,
+        campaign_adapter: CampaignAdapterUnofficial,
+        token_manager: TokenManager,
+        auth_data: UnofficialUserAuthDataDTO | None = None,
+        subjects: dict[int, SubjectDTO] | None = None,
+    ) -> None:
+        self.job_id = job_id
+        self.user_id = user_id
+        self.campaign = campaign
+        self.checkpoint = checkpoint
+        self.checkpoints = checkpoints
+        self.campaign_adapter = campaign_adapter
+        self.token_manager = token_manager
+        self.step: CampaignCreateStep | None = None
+        self.auth_data = auth_data
+        self.subjects = subjects
+        # Бюджет после пополнения в этой попытке: запуск кампании не запрашивает его повторно.
+        self.budget: int | None = None
+        self.session: WBSession | None = None
+
+    @property
+    def wb_campaign_id(self) -> int:
+        if self.checkpoint.wb_campaign_id is None:
+            raise ValueError(f"Campaign is not created yet. job_id={self.job_id}")
+        return self.checkpoint.wb_campaign_id
+
+    async def run(self) -> int:
+        """Выполняет оставшиеся шаги и возвращает wb_campaign_id."""
+        for step in CampaignCreateStep:
+            if step in self.checkpoint.done:
+                continue
+            self.step = step
+            session = await self._session()
+            try:
+                with timed(step.value):
+                    await self._run_step(step, session)
+            except WBAErrorNotAuth:
+                session = await self._refresh_session()
+                with timed(step.value):
+                    await self._run_step(step, session)
+            self.checkpoint.done.append(step)
+            with timed("checkpoint"):
+                await self.checkpoints.save(self.campaign.source_id, self.checkpoint)
+            logger.debug(f"Campaign creation step {step.value} is done. job_id={self.job_id}")
+        return self.wb_campaign_id
+
+    def can_resume(self, error: Exception) -> bool:
+        """True, если ошибка временная и создание можно продолжить с текущего шага при повторе задачи.
+
+        Неидемпотентные шаги повторяются, только если запрос заведомо не был выполнен wildberries.
+        """
+        if isinstance(error, (WBUnavailableError, RedisError, httpx.ConnectError, httpx.ConnectTimeout)):
+            return True
+        status_code = getattr(error, "status_code", None)
+        if isinstance(status_code, int) and status_code in TRANSIENT_CODES:
+            return True
+        if self.step in NON_IDEMPOTENT_STEPS:
+            return False
+        if isinstance(error, httpx.TransportError):
+            return True
+        return isinstance(status_code, int) and HTTPStatus.INTERNAL_SERVER_ERROR <= status_code < 600
+
+    async def _run_step(self, step: CampaignCreateStep, session: WBSession) -> None:
+        match step:
+            case CampaignCreateStep.CREATE:
+                self.checkpoint.wb_campaign_id = await self.campaign_adapter.create_campaign(
+                    session=session,
+                    name=self.campaign.name,
+                    nms=self.campaign.nms,
+                    subjects=self.subjects,
+                )
+            case CampaignCreateStep.REPLENISH:
+                replenish = ReplenishBugetRequestDTO(
+                    wb_campaign_id=self.wb_campaign_id,
+                    amount=self.campaign.budget,
+                    type=ReplenishSourceType.ACCOUNT,
+                )
+                self.budget = await self.campaign_adapter.replenish_budget(session=session, replenish=replenish)
+            case CampaignCreateStep.KEYWORDS:
+                await self.campaign_adapter.add_keywords_to_campaign(
+                    session=session,
+                    id=self.wb_campaign_id,
+                    keywords=self.campaign.keywords,
+                )
+            case CampaignCreateStep.FIXED_LIST:
+                await self.campaign_adapter.switch_on_fixed_list(session=session, id=self.wb_campaign_id)
+            case CampaignCreateStep.START:
+                await self.campaign_adapter.start_campaign(session=session, id=self.wb_campaign_id, budget=self.budget)
+
+    async def _session(self) -> WBSession:
+        if self.session is None:
+            self.session = self.campaign_adapter.session(await self._auth_data(), user_id=self.user_id)
+        return self.session
+
+    async def _auth_data(self) -> UnofficialUserAuthDataDTO:
+        if self.auth_data is None:
+            with timed("auth"):
+                self.auth_data = await self.token_manager.auth_data_by_user_id_unofficial(self.user_id)
+        return self.auth_data
+
+    async def _refresh_session(self) -> WBSession:
+        auth_data = await self._auth_data()
+        with timed("refresh_auth"):
+            self.auth_data = await self.token_manager.refresh_auth_data_unofficial(
+                user_id=self.user_id, wb_token_access=auth_data.wb_token_access
+            )
+        self.session = self.campaign_adapter.session(self.auth_data, user_id=self.user_id)
+        return self.session
@@ -1,4 +1,3 @@
-import asyncio
 import uuid
 
 from fastapi import Depends
@@ -22,35 +21,35 @@ class ProductService:
 
     async def products(self, user_id: uuid.UUID, subject_id: int) -> ProductsSubjectDTO:
         auth_data = await self.token_manager.auth_data_by_user_id_unofficial(user_id)
-        self.product_adapter.auth_data = auth_data
+        session = self.product_adapter.session(auth_data, user_id=user_id)
         try:
-            products: ProductsSubjectDTO = await self.product_adapter.products_by_subject(subject_id=subject_id)
+            products: ProductsSubjectDTO = await self.product_adapter.products_by_subject(
+                session=session,
+                subject_id=subject_id,
+            )
             return products
         except WBAErrorNotAuth:
-            await self.token_manager.request_update_user_access_token(
+            auth_data = await self.token_manager.refresh_auth_data_unofficial(
                 user_id=user_id,
                 wb_token_access=auth_data.wb_token_access,
             )
-            await asyncio.sleep(2)
-            self.product_adapter.auth_data = await self.token_manager.auth_data_by_user_id_unofficial(user_id)
-        products = await self.product_adapter.products_by_subject(subject_id=subject_id)
+            session = self.product_adapter.session(auth_data, user_id=user_id)
+        products = await self.product_adapter.products_by_subject(session=session, subject_id=subject_id)
         return products
 
     async def categories(self, user_id: uuid.UUID) -> CategoriesDTO:
         auth_data = await self.token_manager.auth_data_by_user_id_unofficial(user_id)
-        self.product_adapter.auth_data = auth_data
+        session = self.product_adapter.session(auth_data, user_id=user_id)
         try:
-            categories: CategoriesDTO = await self.product_adapter.categories()
+            categories: CategoriesDTO = await self.product_adapter.categories(session=session)
             return categories
         except WBAErrorNotAuth:
-            await self.token_manager.request_update_user_access_token(
+            auth_data = await self.token_manager.refresh_auth_data_unofficial(
                 user_id=user_id,
                 wb_token_access=auth_data.wb_token_access,
             )
-            await asyncio.sleep(5)
-            auth_data = await self.token_manager.auth_data_by_user_id_unofficial(user_id)
-            self.product_adapter.auth_data = auth_data
-        categories = await self.product_adapter.categories()
+            session = self.product_adapter.session(auth_data, user_id=user_id)
+        categories = await self.product_adapter.categories(session=session)
         return categories
 
 
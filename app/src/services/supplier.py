@@ -3,6 +3,7 @@ import uuid
 from fastapi import Depends
 
 from adapters.token import TokenManager
+from adapters.token_age import token_ages
 from adapters.wb.official.advert import AdvertAdapter
 from adapters.wb.unofficial.supplier import SupplierAdapter
 from core.utils.context import AppContext
@@ -29,12 +30,14 @@ class SupplierService:
         wb_x_supplier_id_external: uuid.UUID,
     ) -> str:
         wb_token_access: str = await self.supplier_adapter.wb_user_auth(wb_token_refresh, wb_x_supplier_id_external)
+        await token_ages.issued(wb_token_access)
         return wb_token_access
 
     async def balance(self) -> BalanceDTO:
-        auth_data = await self.token_manager.auth_data_by_user_id_official(AppContext.user_id())
-        self.advert_adapter.auth_data = auth_data
-        return await self.advert_adapter.balance()
+        user_id = AppContext.user_id()
+        auth_data = await self.token_manager.auth_data_by_user_id_official(user_id)
+        session = self.advert_adapter.session(auth_data, user_id=user_id)
+        return await self.advert_adapter.balance(session=session)
 
 
 async def get_supplier_service(
@@ -1,12 +1,25 @@
+from arq import cron
+
+from core.settings import settings
+from tasks.create_campaign_batch import CampaignCreateBatchTask as ccbt
 from tasks.create_full_campaign import CampaignCreateFullTask as ccft
+from tasks.refresh_tokens import RefreshTokensTask as rtt
 from tasks.restart_create_campaign import СontinueCreateCampaignTask as ccct
 
 tasks = [
     ccft.create_full_campaign,
-    ccct.continue_create_campaign
+    ccct.continue_create_campaign,
+    ccbt.create_campaign_batch,
     # CampaignTasks.create_campaign,
     # CampaignTasks.add_keywords_to_campaign,
     # CampaignTasks.replenish_budget,
     # CampaignTasks.start_campaign,
     # CampaignTasks.switch_on_fixed_list,
 ]
+
+cron_jobs = [
+    cron(
+        rtt.refresh_expiring_tokens,
+        minute=set(range(0, 60, settings.WBADAPTER.TOKEN_REFRESH_CRON_MINUTES)),
+    ),
+]
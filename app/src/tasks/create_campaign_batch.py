@@ -0,0 +1,131 @@
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from arq import Retry
+from redis.asyncio import Redis
+
+from adapters.token import TokenManager
+from adapters.wb.unofficial.campaign import CampaignAdapterUnofficial
+from core.settings import logger, settings
+from depends.adapters.token import get_token_manager
+from depends.adapters.unofficial.campaign import get_campaign_adapter_unofficial
+from depends.db.redis import get_redis
+from depends.services.queue import get_queue_service
+from dto.token import UnofficialUserAuthDataDTO
+from dto.unofficial.campaign import CampaignCreateCheckpoint, CampaignCreateJobDTO, SubjectDTO
+from services.campaign_creation import CampaignCheckpoints, CampaignCreation
+from services.queue import BaseQueue
+from tasks.create_full_campaign import CampaignCreateFullTask
+from utils import depends_decorator
+
+
+class SupplierSlots:
+    """Ограничение одновременно создаваемых кампаний поставщика, общее для всех пакетных задач процесса.
+
+    Ограничение действует в пределах процесса воркера: при N воркерах поставщик может создавать до
+    N * CAMPAIGN_BATCH_CONCURRENCY кампаний одновременно. Частоту запросов поставщика ко всем хостам
+    wildberries во всех процессах ограничивает adapters.wb.ratelimit.DistributedRateLimiter.
+    Семафор удаляется, когда его никто не использует.
+    """
+
+    def __init__(self) -> None:
+        self._slots: dict[str, tuple[asyncio.Semaphore, int]] = {}
+
+    @asynccontextmanager
+    async def acquire(self, wb_supplier_id: str) -> AsyncIterator[None]:
+        semaphore, users = self._slots.get(wb_supplier_id) or (
+            asyncio.Semaphore(settings.WBADAPTER.CAMPAIGN_BATCH_CONCURRENCY),
+            0,
+        )
+        self._slots[wb_supplier_id] = (semaphore, users + 1)
+        try:
+            async with semaphore:
+                yield
+        finally:
+            semaphore, users = self._slots[wb_supplier_id]
+            if users > 1:
+                self._slots[wb_supplier_id] = (semaphore, users - 1)
+            else:
+                del self._slots[wb_supplier_id]
+
+
+supplier_slots = SupplierSlots()
+
+
+class CampaignCreateBatchTask:
+    @classmethod
+    @depends_decorator(
+        redis=get_redis,
+        queue_service=get_queue_service,
+        campaign_adapter=get_campaign_adapter_unofficial,
+        token_manager=get_token_manager,
+    )
+    async def create_campaign_batch(
+        cls,
+        ctx: dict,
+        job_id: uuid.UUID,
+        jobs: list[CampaignCreateJobDTO],
+        routing_key: str,
+        user_id: uuid.UUID,
+        redis: Redis,
+        queue_service: BaseQueue,
+        campaign_adapter: CampaignAdapterUnofficial,
+        token_manager: TokenManager,
+    ) -> None:
+        """Создает несколько кампаний пользователя.
+
+        Авторизационные данные и категории nm запрашиваются один раз для всего пакета. Результат
+        каждой кампании публикуется под ее job_id сразу после завершения. Если часть кампаний
+        завершилась временной ошибкой, задача повторяется только для них.
+        """
+        # При повторе задачи кампании с уже опубликованным результатом пропускаются.
+        results = await redis.mget([str(job.job_id) for job in jobs])
+        pending = [job for job, result in zip(jobs, results) if result is None]
+        if not pending:
+            return
+
+        auth_data: UnofficialUserAuthDataDTO | None = None
+        subjects: dict[int, SubjectDTO] | None = None
+        try:
+            auth_data = await token_manager.auth_data_by_user_id_unofficial(user_id)
+            session = campaign_adapter.session(auth_data, user_id=user_id)
+            nms = [nm for job in pending for nm in job.campaign.nms]
+            subjects = await campaign_adapter.get_subjects(session=session, nms=nms)
+        except Exception as e:
+            # Каждая кампания запросит недостающие данные сама и получит собственный результат.
+            logger.warning(f"Could not prefetch campaign batch data. job_id={job_id}, error: {e!r}")
+
+        supplier = auth_data.wb_supplier_id if auth_data else str(user_id)
+        checkpoints = CampaignCheckpoints(redis)
+
+        async def create(job: CampaignCreateJobDTO) -> bool:
+            async with supplier_slots.acquire(supplier):
+                creation = CampaignCreation(
+                    job_id=job.job_id,
+                    user_id=user_id,
+                    campaign=job.campaign,
+                    checkpoint=await checkpoints.restore(job.campaign.source_id, CampaignCreateCheckpoint()),
+                    checkpoints=checkpoints,
+                    campaign_adapter=campaign_adapter,
+                    token_manager=token_manager,
+                    auth_data=auth_data,
+                    subjects=subjects,
+                )
+                job_result = await CampaignCreateFullTask.attempt_campaign_creation(ctx=ctx, creation=creation)
+            if job_result is None:
+                return False
+            await CampaignCreateFullTask.finish_campaign_creation(
+                creation=creation,
+                job_result=job_result,
+                routing_key=routing_key,
+                redis=redis,
+                queue_service=queue_service,
+            )
+            return True
+
+        finished = await asyncio.gather(*(create(job) for job in pending))
+        if not all(finished):
+            logger.info(f"Campaign batch will be resumed. job_id={job_id}, pending={finished.count(False)}")
+            raise Retry(defer=settings.WBADAPTER.CAMPAIGN_CREATE_RETRY_DELAY)
@@ -1,22 +1,24 @@
-import asyncio
+import time
 import uuid
 from http import HTTPStatus
 
+from arq import Retry
 from redis.asyncio import Redis
+from redis.exceptions import RedisError
 
 from adapters.token import TokenManager
 from adapters.wb.unofficial.campaign import CampaignAdapterUnofficial
 from core.settings import logger, settings
+from core.utils.timing import JobTimings, job_timings, timed
 from depends.adapters.token import get_token_manager
 from depends.adapters.unofficial.campaign import get_campaign_adapter_unofficial
 from depends.db.redis import get_redis
 from depends.services.queue import get_queue_service
 from dto.job_result import RabbitJobResult
-from dto.token import UnofficialUserAuthDataDTO
-from dto.unofficial.campaign import CampaignCreateDTO, ReplenishBugetRequestDTO, ReplenishSourceType
-from exceptions.base import WBAErrorNotAuth
+from dto.unofficial.campaign import CampaignCreateCheckpoint, CampaignCreateDTO, CampaignCreateTimings
 from schemas.v1.base import JobResult
 from schemas.v1.campaign import CreateCampaignResponse
+from services.campaign_creation import CampaignCheckpoints, CampaignCreation, CampaignSources
 from services.queue import BaseQueue
 from utils import depends_decorator
 
@@ -41,66 +43,158 @@ class CampaignCreateFullTask:
         campaign_adapter_unofficial: CampaignAdapterUnofficial,
         token_manager: TokenManager,
     ) -> None:
-        rabbitmq_message = RabbitJobResult(job_id=job_id).json()
-        job_result: str = ""
+        await cls.run_campaign_creation(
+            ctx=ctx,
+            job_id=job_id,
+            campaign=campaign,
+            routing_key=routing_key,
+            user_id=user_id,
+            initial=CampaignCreateCheckpoint(),
+            redis=redis,
+            queue_service=queue_service,
+            campaign_adapter=campaign_adapter_unofficial,
+            token_manager=token_manager,
+        )
 
-        user_auth_data: UnofficialUserAuthDataDTO = await token_manager.auth_data_by_user_id_unofficial(user_id)
-        campaign_adapter_unofficial.auth_data = user_auth_data
+    @classmethod
+    async def run_campaign_creation(
+        cls,
+        ctx: dict,
+        job_id: uuid.UUID,
+        campaign: CampaignCreateDTO,
+        routing_key: str,
+        user_id: uuid.UUID,
+        initial: CampaignCreateCheckpoint,
+        redis: Redis,
+        queue_service: BaseQueue,
+        campaign_adapter: CampaignAdapterUnofficial,
+        token_manager: TokenManager,
+    ) -> None:
+        """Выполняет шаги создания кампании, продолжая с сохраненного в redis состояния задачи.
 
-        try:
-            wb_campaign_id = await campaign_adapter_unofficial.create_campaign(
-                name=campaign.name,
-                nms=campaign.nms,
-            )
-        except WBAErrorNotAuth:
-            await token_manager.request_update_user_access_token(
-                user_id=user_id, wb_token_access=user_auth_data.wb_token_access
-            )
-            await asyncio.sleep(10)
-            user_auth_data = await token_manager.auth_data_by_user_id_unofficial(user_id)
-            campaign_adapter_unofficial.auth_data = user_auth_data
-            wb_campaign_id = await campaign_adapter_unofficial.create_campaign(
-                name=campaign.name,
-                nms=campaign.nms,
-            )
+        При временной ошибке задача повторяется средствами arq (Retry) и продолжает работу
+        с невыполненного шага; результат отправляется после успеха или последней попытки.
 
-        try:
-            replenish = ReplenishBugetRequestDTO(
-                wb_campaign_id=wb_campaign_id,
-                amount=campaign.budget,
-                type=ReplenishSourceType.ACCOUNT,
-            )
-            await campaign_adapter_unofficial.replenish_budget(replenish)
-            await campaign_adapter_unofficial.add_keywords_to_campaign(id=wb_campaign_id, keywords=campaign.keywords)
-            await campaign_adapter_unofficial.switch_on_fixed_list(id=wb_campaign_id)
-            await campaign_adapter_unofficial.start_campaign(id=wb_campaign_id)
+        Arguments:
+            initial -- состояние, если для source_id кампании нет сохраненного.
+        """
+        checkpoints = CampaignCheckpoints(redis)
+        creation = CampaignCreation(
+            job_id=job_id,
+            user_id=user_id,
+            campaign=campaign,
+            checkpoint=await checkpoints.restore(campaign.source_id, initial),
+            checkpoints=checkpoints,
+            campaign_adapter=campaign_adapter,
+            token_manager=token_manager,
+        )
+        job_result = await cls.attempt_campaign_creation(ctx=ctx, creation=creation)
+        if job_result is None:
+            raise Retry(defer=settings.WBADAPTER.CAMPAIGN_CREATE_RETRY_DELAY)
+        await cls.finish_campaign_creation(
+            creation=creation,
+            job_result=job_result,
+            routing_key=routing_key,
+            redis=redis,
+            queue_service=queue_service,
+        )
 
+    @classmethod
+    async def attempt_campaign_creation(
+        cls, ctx: dict, creation: CampaignCreation
+    ) -> JobResult[CreateCampaignResponse] | None:
+        """Выполняет оставшиеся шаги создания кампании и возвращает результат задачи.
+
+        Returns:
+            JobResult или None, если ошибка временная и создание нужно продолжить
+            при следующей попытке задачи (состояние при этом сохранено в redis).
+        """
+        campaign = creation.campaign
+        job_try = ctx.get("job_try", 1)
+        timings = cls.resume_timings(creation)
+        job_timings.set(timings)
+        try:
+            wb_campaign_id = await creation.run()
         except Exception as e:
+            # Время попыток сохраняется вместе с состоянием, чтобы следующая попытка его продолжила.
+            creation.checkpoint.timings = CampaignCreateTimings(
+                job_id=creation.job_id, summary=timings.summary(), deferred_at=time.time()
+            )
+            saved = await creation.checkpoints.save(campaign.source_id, creation.checkpoint)
+            if saved and job_try < settings.WBADAPTER.CAMPAIGN_CREATE_MAX_TRIES and creation.can_resume(e):
+                logger.warning(
+                    f"Campaign creation failed at step {creation.step}, retrying. job_id={creation.job_id}, "
+                    f"try={job_try}, error: {e!r}",
+                    extra={"job_id": str(creation.job_id), "job_try": job_try, "timings": timings.summary().dict()},
+                )
+                return None
             logger.exception(e)
-            job_result = JobResult(
+            created_id = creation.checkpoint.wb_campaign_id
+            return JobResult[CreateCampaignResponse](
                 code=e.__class__.__name__,
                 status_code=getattr(e, "status_code", 999),
                 text=str(e),
-                response=CreateCampaignResponse(source_id=campaign.source_id),
-            ).json()
-        else:
-            job_result = JobResult(
-                code="CampaignStartSuccess",
-                status_code=HTTPStatus.CREATED,
                 response=CreateCampaignResponse(
-                    wb_campaign_id=str(wb_campaign_id),
+                    wb_campaign_id=str(created_id) if created_id else None,
                     source_id=campaign.source_id,
                 ),
-            ).json()
+                job_try=job_try,
+            )
+        return JobResult[CreateCampaignResponse](
+            code="CampaignStartSuccess",
+            status_code=HTTPStatus.CREATED,
+            response=CreateCampaignResponse(
+                wb_campaign_id=str(wb_campaign_id),
+                source_id=campaign.source_id,
+            ),
+            job_try=job_try,
+        )
+
+    @staticmethod
+    def resume_timings(creation: CampaignCreation) -> JobTimings:
+        """Продолжает время предыдущих попыток задачи, учитывая ожидание повтора как шаг defer."""
+        saved = creation.checkpoint.timings
+        creation.checkpoint.timings = None
+        if saved is None or saved.job_id != creation.job_id:
+            return JobTimings()
+        timings = JobTimings(previous=saved.summary)
+        timings.defer(max(0.0, time.time() - saved.deferred_at))
+        return timings
 
-        finally:
-            await cls.save_and_notify_job_result(
-                job_result=job_result,
-                name=str(job_id),
-                message=rabbitmq_message,
-                routing_key=routing_key,
-                redis=redis,
-                queue_service=queue_service,
+    @classmethod
+    async def finish_campaign_creation(
+        cls,
+        creation: CampaignCreation,
+        job_result: JobResult[CreateCampaignResponse],
+        routing_key: str,
+        redis: Redis,
+        queue_service: BaseQueue,
+    ) -> None:
+        if job_result.status_code != HTTPStatus.CREATED:
+            # После ошибки создание можно запустить снова: пройденные шаги будут пропущены.
+            await CampaignSources(redis).release(creation.campaign.source_id, creation.job_id)
+        timings = job_timings.get()
+        if timings:
+            job_result.timings = timings.summary()
+        await cls.save_and_notify_job_result(
+            job_result=job_result.json(),
+            name=str(creation.job_id),
+            message=RabbitJobResult(job_id=creation.job_id).json(),
+            routing_key=routing_key,
+            redis=redis,
+            queue_service=queue_service,
+        )
+        if timings:
+            # Сохранение и публикация результата измеряются после его записи: время дописывается в результат.
+            job_result.timings = timings.summary()
+            try:
+                await redis.set(name=str(creation.job_id), value=job_result.json(), xx=True, keepttl=True)
+            except RedisError as e:
+                logger.warning(f"Could not save job timings. job_id={creation.job_id}, error: {e}")
+            # Логи - источник метрик времени создания кампаний.
+            logger.info(
+                f"Campaign creation finished with {job_result.code}. job_id={creation.job_id}",
+                extra={"job_id": str(creation.job_id), "timings": job_result.timings.dict()},
             )
 
     @classmethod
@@ -113,9 +207,11 @@ class CampaignCreateFullTask:
         routing_key: str,
         message: str,
     ) -> None:
-        await redis.set(
-            name=name,
-            value=job_result,
-            ex=settings.REDIS.JOB_RESULT_EX_TIME,
-        )
-        await queue_service.publish(routing_key=routing_key, message=message, priority=1)
+        with timed("save_result"):
+            await redis.set(
+                name=name,
+                value=job_result,
+                ex=settings.REDIS.JOB_RESULT_EX_TIME,
+            )
+        with timed("publish"):
+            await queue_service.publish(routing_key=routing_key, message=message, priority=1)
@@ -0,0 +1,40 @@
+from adapters.token import TokenManager
+from adapters.token_age import token_ages
+from core.settings import logger, settings
+from depends.adapters.token import get_token_manager
+from utils import depends_decorator
+
+
+class RefreshTokensTask:
+    @classmethod
+    @depends_decorator(
+        token_manager=get_token_manager,
+    )
+    async def refresh_expiring_tokens(cls, ctx: dict, token_manager: TokenManager) -> None:
+        """Заранее обновляет wb_token_access, срок жизни которых скоро истечет.
+
+        За один запуск обновляется не более TOKEN_REFRESH_BATCH самых старых токенов,
+        чтобы обновления распределялись между запусками, а не приходились на один момент.
+        """
+        user_ids = await token_ages.due(limit=settings.WBADAPTER.TOKEN_REFRESH_BATCH)
+        if not user_ids:
+            return
+
+        auth_data = await token_manager.auth_data_many(user_ids)
+        refreshed = 0
+        for user_id in user_ids:
+            user_auth_data = auth_data.get(user_id)
+            if user_auth_data is None or not user_auth_data.wb_token_access:
+                await token_ages.forget(user_id)
+                continue
+            try:
+                await token_manager.request_update_user_access_token(
+                    user_id=user_id,
+                    wb_token_access=user_auth_data.wb_token_access,
+                )
+            except Exception as e:
+                logger.warning(f"Could not request wb_token_access update. user_id={user_id}, error: {e}")
+                continue
+            await token_ages.touch(user_id)
+            refreshed += 1
+        logger.info(f"Requested wb_token_access update for {refreshed} of {len(user_ids)} users.")